@@ -1,5 +1,6 @@
 import logging
 import time # For agent detail consistency check
+from collections import deque
 from fastapi import FastAPI, HTTPException, Body, Query, Depends, status
 from fastapi.middleware.cors import CORSMiddleware # Import CORS Middleware
 from fastapi.security import OAuth2PasswordBearer # Example for Auth
@@ -336,6 +337,18 @@ async def api_list_agents(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database error listing agents.")
 
 
+@app.get("/agents/status-summary", response_model=Dict[str, int], tags=["Agents"])
+async def api_agent_status_summary(db: Session = Depends(get_db)):
+    """
+    Number of agents in each status (e.g. how many are running), computed in the database.
+    """
+    try:
+        return crud.agent_status_summary(db)
+    except Exception as e:
+        logging.exception(f"Database error summarizing agent statuses: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database error summarizing agent statuses.")
+
+
 # Use path parameter type hint for automatic validation
 @app.get("/agents/{agent_id}", response_model=AgentDetailResponse, tags=["Agents"]) # Use specific response model
 async def api_get_agent_details(agent_id: int, db: Session = Depends(get_db)): # Removed current_user
@@ -452,6 +465,8 @@ async def api_update_agent(
         if not updated_agent:
              # Should have been caught by get_agent_by_id, but defensive check
              raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Agent with ID {agent_id} not found during update.")
+        if agent_update.group_id is not None or agent_update.clear_group:
+            agent_manager.notify_group_reassigned(agent_id, updated_agent.group_id)
 
         # Return the updated agent details (similar to GET details)
         # Re-fetch details to ensure consistency after update
@@ -529,9 +544,11 @@ async def api_stop_agent(agent_id: int, db: Session = Depends(get_db)): # Remove
 
     # --- Initiate Stop Process ---
     try:
+        # STOPPING goes first: the strategy's run loop writes (and flushes) STOPPED while stop_agent_process waits
+        prev_status, prev_message = db_agent.status, db_agent.status_message
+        crud.update_agent_status(db, agent_id, AgentStatusEnum.STOPPING)
         success = agent_manager.stop_agent_process(str(agent_id))
         if success:
-            updated_agent = crud.update_agent_status(db, agent_id, AgentStatusEnum.STOPPING)
             logging.info(f"Agent {agent_id} stop initiated via API.")
             return AgentActionResponse(
                 agent_id=str(agent_id),
@@ -540,11 +557,12 @@ async def api_stop_agent(agent_id: int, db: Session = Depends(get_db)): # Remove
             )
         else:
              # If manager says it wasn't running, but DB state was stoppable, maybe just update DB?
-             if db_agent.status in can_stop_status:
-                 logging.warning(f"Agent manager reported agent {agent_id} not running during stop, but DB status was {db_agent.status.value}. Updating DB status to STOPPED.")
+             if prev_status in can_stop_status:
+                 logging.warning(f"Agent manager reported agent {agent_id} not running during stop, but DB status was {prev_status.value}. Updating DB status to STOPPED.")
                  crud.update_agent_status(db, agent_id, AgentStatusEnum.STOPPED, "Stopped via API after manager reported not running")
                  return AgentActionResponse(agent_id=str(agent_id), status=AgentStatusEnum.STOPPED.value, message="Agent likely already stopped; status updated.")
              else:
+                crud.update_agent_status(db, agent_id, prev_status, prev_message)
                 raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to initiate agent stop via manager.")
     except Exception as e:
         logging.exception(f"Error stopping agent {agent_id} process: {e}")
@@ -613,26 +631,29 @@ async def api_get_performance(
 
     try:
         # TODO: Implement actual KPI calculations and time filtering in CRUD
-        trades = crud.get_trades_for_agent(db, agent_id, limit=5000) # Get recent trades
-
-        # Placeholder calculations
-        total_pnl = sum(t.pnl_usd for t in trades if t.pnl_usd is not None)
-        total_trades = len(trades)
-        winning_trades = sum(1 for t in trades if t.pnl_usd is not None and t.pnl_usd > 0)
-        win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
+        # Stream recent trades once: count, collect PnLs, keep only the rows we return
+        total_trades = 0
+        pnl_values = []
+        tail = deque(maxlen=100) # Limit response size
+        for t in crud.iter_trades_for_agent(db, agent_id, limit=5000):
+            total_trades += 1
+            if t.pnl_usd is not None:
+                pnl_values.append(t.pnl_usd)
+            tail.append(t)
+        stats = crud.calculate_pnl_statistics(pnl_values, total_trades)
 
         trade_list = [
             {
                 "timestamp": t.timestamp.isoformat(), "symbol": t.symbol, "side": t.side,
                 "price": t.price, "quantity": t.quantity, "order_id": t.order_id, "pnl_usd": t.pnl_usd
-            } for t in trades[-100:] # Limit response size
+            } for t in tail
         ]
 
         performance_data = {
-            "total_pnl_usd": round(total_pnl, 2),
-            "win_rate_pct": round(win_rate, 1),
+            "total_pnl_usd": round(stats["total_pnl_usd"], 2),
+            "win_rate_pct": round(stats["win_rate_pct"], 1),
             "total_trades": total_trades,
-            "sharpe_ratio": 0.0, # Placeholder
+            "sharpe_ratio": round(stats["sharpe_ratio"], 2),
             "trades": trade_list,
         }
 
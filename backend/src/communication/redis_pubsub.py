@@ -1,13 +1,19 @@
 import redis
 import json
+import orjson # Faster (de)serialization on the message path; its errors subclass json's
 import logging
 import threading
 import time
-from typing import Callable, Optional, Dict, Any
+import functools
+from collections import deque
+from typing import Callable, Optional, Dict, Any, List, Union
 from decouple import config
 
 log = logging.getLogger(__name__)
 
+# Stringify non-str dict keys (e.g. {agent_id: pnl}) like json.dumps did instead of raising
+_DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS
+
 # Configuration (add these to .env if not using defaults)
 REDIS_HOST = config("REDIS_HOST", default="redis") # Docker service name
 REDIS_PORT = config("REDIS_PORT", default=6379, cast=int)
@@ -18,6 +24,19 @@ AGENT_EVENTS_CHANNEL = "agent_events" # e.g., trade executed, parameter update s
 GROUP_UPDATES_CHANNEL = "group_updates" # e.g., aggregated performance, group signals
 LEARNING_MODULE_CHANNEL = "learning_module" # For communication with a central learning module
 
+# Outbox for publish_async: bounded ring buffer (oldest dropped when full), flushed in pipelined chunks
+PUBLISH_OUTBOX_SIZE = config("PUBLISH_OUTBOX_SIZE", default=10000, cast=int)
+PUBLISH_PIPELINE_CHUNK = 100
+
+@functools.lru_cache(maxsize=1024)
+def _parse_message(raw: Union[str, bytes]) -> Dict[str, Any]:
+    """
+    JSON-decodes a raw Redis payload. Cached on the raw payload so a message repeated verbatim
+    (e.g. a periodic group broadcast) is parsed once. The returned dict is shared between
+    handlers and must be treated as read-only.
+    """
+    return orjson.loads(raw)
+
 class CommunicationBus:
     """Handles publishing and subscribing to messages using Redis Pub/Sub."""
 
@@ -26,12 +45,21 @@ class CommunicationBus:
         self._pubsub: Optional[redis.client.PubSub] = None
         self._listener_thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
+        # One Redis subscription per channel, fanned out in-process to every registered handler
+        self._handlers: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._handlers_lock = threading.Lock()
+        # Fire-and-forget publishing (see publish_async)
+        self._outbox: deque = deque(maxlen=PUBLISH_OUTBOX_SIZE)
+        self._outbox_ready = threading.Event()
+        self._publisher_thread: Optional[threading.Thread] = None
+        self._publisher_lock = threading.Lock()
         self._connect()
 
     def _connect(self):
         """Establishes connection to Redis."""
         try:
-            self._redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+            # Raw bytes (parsed by hiredis when installed); payloads go straight to orjson
+            self._redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=False)
             self._redis_client.ping()
             self._pubsub = self._redis_client.pubsub(ignore_subscribe_messages=True)
             log.info(f"CommunicationBus connected to Redis at {REDIS_HOST}:{REDIS_PORT}")
@@ -54,7 +82,7 @@ class CommunicationBus:
             log.error("Cannot publish message, Redis client not ready.")
             return False
         try:
-            message_json = json.dumps(message_data)
+            message_json = orjson.dumps(message_data, option=_DUMPS_OPTIONS)
             self._redis_client.publish(channel, message_json)
             log.debug(f"Published to channel '{channel}': {message_json}")
             return True
@@ -66,34 +94,128 @@ class CommunicationBus:
             log.exception(f"Error publishing message to channel '{channel}': {e}")
             return False
 
+    def publish_async(self, channel: str, message_data: Dict[str, Any]) -> bool:
+        """
+        Queues a message for publishing and returns immediately. Serialization happens here, once;
+        a background thread sends queued messages in Redis pipelines, so callers on a trading path
+        never wait on a Redis round trip. Delivery is best-effort: if the outbox is full the oldest
+        message is dropped.
+        """
+        if not self.is_ready():
+            log.error("Cannot publish message, Redis client not ready.")
+            return False
+        try:
+            self._outbox.append((channel, orjson.dumps(message_data, option=_DUMPS_OPTIONS)))
+        except orjson.JSONEncodeError as e:
+            log.error(f"Cannot serialize message for channel '{channel}': {e}")
+            return False
+        self._ensure_publisher()
+        self._outbox_ready.set()
+        return True
+
+    def _ensure_publisher(self):
+        if self._publisher_thread is not None and self._publisher_thread.is_alive():
+            return
+        with self._publisher_lock:
+            if self._publisher_thread is None or not self._publisher_thread.is_alive():
+                self._publisher_thread = threading.Thread(target=self._publisher_loop, name="CommBusPublisher", daemon=True)
+                self._publisher_thread.start()
+
+    def _flush_outbox(self):
+        """Sends everything currently in the outbox, PUBLISH_PIPELINE_CHUNK messages per pipeline."""
+        while self._outbox:
+            chunk = []
+            try:
+                while len(chunk) < PUBLISH_PIPELINE_CHUNK:
+                    chunk.append(self._outbox.popleft())
+            except IndexError:
+                pass
+            client = self._redis_client
+            if client is None:
+                log.warning(f"Redis client not ready; dropping {len(chunk)} queued messages.")
+                continue
+            try:
+                pipe = client.pipeline(transaction=False)
+                for channel, message_json in chunk:
+                    pipe.publish(channel, message_json)
+                pipe.execute()
+                log.debug(f"Published {len(chunk)} queued messages.")
+            except redis.exceptions.ConnectionError as e:
+                log.error(f"Redis connection error while flushing {len(chunk)} queued messages: {e}")
+                self._connect() # Attempt to reconnect
+            except Exception as e:
+                log.exception(f"Error flushing {len(chunk)} queued messages: {e}")
+
+    def _publisher_loop(self):
+        while True:
+            self._outbox_ready.wait()
+            self._outbox_ready.clear()
+            self._flush_outbox()
+
     def subscribe(self, channel: str, handler: Callable[[Dict[str, Any]], None]):
-        """Subscribes to a channel and registers a handler function."""
+        """
+        Registers a handler for a channel. The bus holds a single Redis subscription per channel and
+        its listener thread dispatches each message to all handlers, so many agents subscribing to the
+        same channel cost one subscription and one decode per message.
+        """
         if not self.is_ready():
             log.error(f"Cannot subscribe to channel '{channel}', Redis client not ready.")
             return
 
         try:
-            self._pubsub.subscribe(**{channel: lambda msg: self._message_handler(handler, msg)})
-            log.info(f"Subscribed to channel '{channel}'")
+            with self._handlers_lock:
+                handlers = self._handlers.setdefault(channel, [])
+                new_channel = not handlers
+                handlers.append(handler)
+            if new_channel:
+                self._pubsub.subscribe(channel)
+                log.info(f"Subscribed to channel '{channel}'")
             # Start the listener thread if it's not already running
             if self._listener_thread is None or not self._listener_thread.is_alive():
                 self._start_listener()
         except redis.exceptions.ConnectionError as e:
              log.error(f"Redis connection error during subscribe to '{channel}': {e}")
-             self._connect() # Attempt to reconnect
+             self._connect() # Attempt to reconnect; the listener resubscribes stored channels
         except Exception as e:
             log.exception(f"Error subscribing to channel '{channel}': {e}")
 
-    def _message_handler(self, handler: Callable[[Dict[str, Any]], None], message: Dict):
-        """Internal handler that decodes JSON and calls the user-provided handler."""
+    def unsubscribe(self, channel: str, handler: Callable[[Dict[str, Any]], None]):
+        """Removes a handler; the Redis subscription is dropped with the channel's last handler."""
+        with self._handlers_lock:
+            handlers = self._handlers.get(channel)
+            if not handlers or handler not in handlers:
+                return
+            handlers.remove(handler)
+            if handlers:
+                return
+            del self._handlers[channel]
         try:
-            data = json.loads(message['data'])
-            log.debug(f"Received message on channel '{message['channel']}': {data}")
-            handler(data)
-        except json.JSONDecodeError:
-            log.warning(f"Received non-JSON message on channel '{message['channel']}': {message['data']}")
+            if self.is_ready():
+                self._pubsub.unsubscribe(channel)
+                log.info(f"Unsubscribed from channel '{channel}'")
         except Exception as e:
-            log.exception(f"Error processing message from channel '{message['channel']}': {e}")
+            log.error(f"Error unsubscribing from channel '{channel}': {e}")
+
+    def _dispatch(self, message: Dict):
+        """Decodes a message once and calls every handler registered for its channel."""
+        channel = message['channel']
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        with self._handlers_lock:
+            handlers = list(self._handlers.get(channel, ()))
+        if not handlers:
+            return
+        try:
+            data = _parse_message(message['data'])
+        except json.JSONDecodeError:
+            log.warning(f"Received non-JSON message on channel '{channel}': {message['data']}")
+            return
+        log.debug(f"Received message on channel '{channel}': {data}")
+        for handler in handlers:
+            try:
+                handler(data)
+            except Exception as e:
+                log.exception(f"Error processing message from channel '{channel}': {e}")
 
     def _listener_loop(self):
         """Listens for messages in a loop."""
@@ -106,17 +228,19 @@ class CommunicationBus:
                      self._connect()
                      # Resubscribe to channels if connection is re-established
                      if self.is_ready() and self._pubsub:
-                          # This requires storing subscriptions or having components resubscribe
-                          log.warning("Need to re-implement channel resubscription logic after reconnect.")
-                          # self._pubsub.subscribe(...) # Example - needs stored handlers
+                          with self._handlers_lock:
+                              channels = list(self._handlers)
+                          if channels:
+                              self._pubsub.subscribe(*channels)
+                              log.info(f"Resubscribed to {len(channels)} channels after reconnect.")
                      continue
 
                 # Check for messages with a timeout to allow checking the stop event
                 message = self._pubsub.get_message(timeout=1.0)
-                # Note: get_message() processes one message at a time if using a handler dict
-                # If not using handlers in subscribe, you'd process message here.
                 if message is None:
                     continue # Timeout, loop again
+                if message.get('type') == 'message':
+                    self._dispatch(message)
 
             except redis.exceptions.ConnectionError as e:
                  log.error(f"Redis connection error in listener loop: {e}")
@@ -144,6 +268,7 @@ class CommunicationBus:
 
     def stop_listener(self):
         """Stops the listener thread gracefully."""
+        self._flush_outbox() # Don't lose queued publish_async messages
         if self._listener_thread and self._listener_thread.is_alive():
             log.info("Stopping CommunicationBus listener thread...")
             self._stop_event.set()
@@ -1,19 +1,17 @@
-# Manages running agent strategy instances (threads)
+# Manages running agent strategy instances (run loops on the shared strategy runtime)
 
 import time
 import threading
 import logging
 from typing import Dict, Any, Optional, Type, List # Import List
-from sqlalchemy.orm import Session
 
 # Import necessary components
 from ..strategies.base_strategy import BaseStrategy
 from ..strategies.grid_strategy import GridStrategy
 # from ..strategies.arbitrage_strategy import ArbitrageStrategy
-from ..persistence import database
 from .binance_client import BinanceClientWrapper
 # Import communication bus
-from ..communication.redis_pubsub import CommunicationBus
+from ..communication.redis_pubsub import CommunicationBus, LEARNING_MODULE_CHANNEL
 
 log = logging.getLogger(__name__)
 
@@ -27,7 +25,7 @@ STRATEGY_MAP: Dict[str, Type[BaseStrategy]] = {
 # --- Runtime Agent Store ---
 # Stores references to running strategy instances and threads
 # Key: agent_id (string representation of DB int ID)
-# Value: {"instance": BaseStrategy, "thread": threading.Thread, "start_time": float, "comm_bus": CommunicationBus}
+# Value: {"instance": BaseStrategy, "start_time": float, "strategy_type": str, "comm_bus": CommunicationBus}
 _running_agents: Dict[str, Dict[str, Any]] = {}
 _lock = threading.Lock()
 
@@ -61,6 +59,11 @@ def start_agent_process(agent_id: str, strategy_type: str, config: Dict[str, Any
     Instantiates and starts the strategy thread for a given agent.
     Returns True if start initiated successfully, False otherwise.
     """
+    # Warm the shared symbol-filter cache before taking the lock: the strategy constructor reads it,
+    # and an exchangeInfo fetch there would hold up every other start/stop call
+    if binance_client_instance and binance_client_instance.is_ready() and config.get("symbol"):
+        binance_client_instance.get_symbol_filters(config["symbol"])
+
     with _lock:
         if agent_id in _running_agents:
             log.warning(f"Agent Manager: Agent {agent_id} is already running.")
@@ -78,43 +81,34 @@ def start_agent_process(agent_id: str, strategy_type: str, config: Dict[str, Any
              log.error(f"Agent Manager: Cannot start agent {agent_id}, shared Binance client is not available.")
              return False
 
-        # Create a new DB session specifically for this agent thread
-        # Each thread needs its own session
-        db_session: Session = next(database.get_db())
-
         try:
             # Instantiate the strategy
             strategy_instance = StrategyClass(
                 agent_id=int(agent_id),
                 config=config,
-                db_session=db_session,
                 binance_client=binance_client_instance,
                 comm_bus=comm_bus_instance # Pass shared comm bus instance
             )
 
-            # Start the strategy's run loop in a new thread
-            # The start method now handles thread creation internally
-            strategy_instance.start() # This creates and starts the thread
+            # Schedule the strategy's run loop on the shared strategy runtime
+            strategy_instance.start()
 
-            # Store the instance and thread info
+            # Store the instance info
             _running_agents[agent_id] = {
                 "instance": strategy_instance,
-                "thread": strategy_instance._thread,
                 "start_time": time.time(),
                 "strategy_type": strategy_type,
                 "comm_bus": comm_bus_instance # Store reference if needed later
             }
-            log.info(f"Agent Manager: Strategy thread for agent {agent_id} started.")
+            log.info(f"Agent Manager: Strategy run loop for agent {agent_id} started.")
             # Note: Status is updated to STARTING by API/Tool, then RUNNING/ERROR by the strategy thread itself.
             return True
 
         except ConnectionError as e:
              log.error(f"Agent Manager: Connection error during strategy init for agent {agent_id}: {e}")
-             db_session.close() # Clean up session if init fails
              return False
         except Exception as e:
             log.exception(f"Agent Manager: Failed to instantiate or start strategy for agent {agent_id}: {e}")
-            db_session.close() # Clean up session if init fails
             # Optionally update agent status to ERROR here? Or let API handle it.
             return False
 
@@ -141,7 +135,7 @@ def stop_agent_process(agent_id: str) -> bool:
             strategy_instance.stop()
 
             # Remove from running agents dict *after* signaling stop
-            # The thread itself will update final DB status and close its session
+            # The thread itself will update final DB status
             _running_agents.pop(agent_id, None)
             log.info(f"Agent Manager: Stop signal sent to agent {agent_id} and removed from active tracking.")
             # Note: We don't join the thread here to avoid blocking the API request.
@@ -154,16 +148,29 @@ def stop_agent_process(agent_id: str) -> bool:
             return False
 
 
+def notify_group_reassigned(agent_id: int, group_id: Optional[int]):
+    """Tells a running agent that its group changed so it refreshes its cached group ID."""
+    message = {"type": "group_reassigned", "payload": {"agent_id": agent_id, "group_id": group_id}}
+    if comm_bus_instance and comm_bus_instance.is_ready():
+        comm_bus_instance.publish(LEARNING_MODULE_CHANNEL, message)
+        return
+    # No bus: agents run in this process, so deliver directly
+    with _lock:
+        agent_info = _running_agents.get(str(agent_id))
+    if agent_info and agent_info.get("instance"):
+        agent_info["instance"]._handle_comm_message(message)
+
+
 def is_agent_running(agent_id: str) -> bool:
     """Checks if the agent is actively tracked by the manager."""
     with _lock:
         agent_info = _running_agents.get(agent_id)
-        # Also check if the thread associated is still alive
-        if agent_info and agent_info.get("thread") and agent_info["thread"].is_alive():
+        # Also check if the agent's run loop is still alive
+        if agent_info and agent_info.get("instance") and agent_info["instance"].is_running():
             return True
         elif agent_info:
              # Thread died unexpectedly? Clean up.
-             log.warning(f"Agent Manager: Agent {agent_id} found in tracking but thread is not alive. Cleaning up.")
+             log.warning(f"Agent Manager: Agent {agent_id} found in tracking but its run loop is not alive. Cleaning up.")
              _running_agents.pop(agent_id, None)
              # DB status should be updated to ERROR by the thread's exception handler ideally,
              # but we could force an update here if needed.
@@ -179,20 +186,20 @@ def get_running_agent_info(agent_id: str) -> Optional[Dict[str, Any]]:
 
 def get_all_running_agent_ids() -> List[str]:
     """Gets a list of IDs of all agents actively tracked by the manager."""
-    # Check thread aliveness during listing for cleanup
+    # Check run loop aliveness during listing for cleanup
     running_ids = []
     stale_ids = []
     with _lock:
         for agent_id, agent_info in _running_agents.items():
-             thread = agent_info.get("thread")
-             if thread and thread.is_alive():
+             instance = agent_info.get("instance")
+             if instance and instance.is_running():
                  running_ids.append(agent_id)
              else:
                  stale_ids.append(agent_id)
 
         # Cleanup stale entries
         if stale_ids:
-             log.warning(f"Agent Manager: Cleaning up stale entries for non-alive threads: {stale_ids}")
+             log.warning(f"Agent Manager: Cleaning up stale entries for finished run loops: {stale_ids}")
              for stale_id in stale_ids:
                  _running_agents.pop(stale_id, None)
                  # TODO: Consider updating DB status to ERROR for these stale agents
@@ -1,16 +1,72 @@
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from binance.client import Client
 from binance.exceptions import BinanceAPIException, BinanceOrderException
+from cachetools import TTLCache
 from decouple import config
-from typing import Optional, Dict, List, Any
+from decimal import Decimal
+from typing import Optional, Dict, List, Any, Callable, Union
+
+from .user_data_stream import UserDataStream
 
 # Configure logging
 log = logging.getLogger(__name__)
 
+# Backoff used when a 429/418 response carries no Retry-After header
+DEFAULT_RATE_LIMIT_BACKOFF_SECONDS = 60.0
+
+# Max orders in flight at once for create_limit_orders (shared by all agents using the wrapper)
+BINANCE_ORDER_CONCURRENCY = config("BINANCE_ORDER_CONCURRENCY", default=10, cast=int)
+# Keep-alive connections kept to the Binance API; sized above order concurrency + strategy workers so
+# concurrent calls reuse warm TLS connections instead of opening (and discarding) extra ones
+BINANCE_HTTP_POOL_SIZE = config("BINANCE_HTTP_POOL_SIZE", default=50, cast=int)
+# Symbol filters change rarely; one exchangeInfo fetch serves every agent until the entries expire
+SYMBOL_INFO_TTL_SECONDS = config("SYMBOL_INFO_TTL_SECONDS", default=3600, cast=int)
+
+# Order placement rate for the whole process (Binance spot allows 10 orders/s per account), with a burst of the same size
+BINANCE_ORDERS_PER_SECOND = config("BINANCE_ORDERS_PER_SECOND", default=10.0, cast=float)
+
+class TokenBucket:
+    """Thread-safe token bucket: acquire() blocks until a token is available at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
 class BinanceClientWrapper:
-    """Handles interactions with the Binance API."""
+    """
+    Handles interactions with the Binance API.
+    One instance is shared by all agents in the process (see agent_manager), so a rate-limit
+    backoff recorded here pauses every agent's API calls at once.
+    """
 
     def __init__(self):
+        self._pause_lock = threading.Lock()
+        self._paused_until = 0.0 # time.monotonic() deadline set by 429/418 responses
+        self._order_executor: Optional[ThreadPoolExecutor] = None # Created on first batch submission
+        self._user_stream: Optional[UserDataStream] = None # Created on first listener
+        self._order_bucket = TokenBucket(BINANCE_ORDERS_PER_SECOND) # Paces create_order across all agents
+        # {symbol: filters} parsed from exchangeInfo. TTLCache is not thread-safe, hence the lock.
+        self._symbol_filters: TTLCache = TTLCache(maxsize=4096, ttl=SYMBOL_INFO_TTL_SECONDS)
+        self._symbol_filters_lock = threading.Lock()
         self.api_key = config("BINANCE_API_KEY", default=None)
         self.secret_key = config("BINANCE_SECRET_KEY", default=None)
 
@@ -22,6 +78,8 @@ class BinanceClientWrapper:
             try:
                 # Consider adding testnet=True parameter if using Binance testnet
                 self.client = Client(self.api_key, self.secret_key)
+                # One pooled session for every REST call in the process (requests' default pool keeps only 10)
+                self.client.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=BINANCE_HTTP_POOL_SIZE))
                 # Test connection
                 self.client.ping()
                 log.info("Binance client initialized and connection successful.")
@@ -36,20 +94,107 @@ class BinanceClientWrapper:
         """Check if the client was initialized successfully."""
         return self.client is not None
 
+    def _note_rate_limit(self, e: BinanceAPIException):
+        """On 429 (rate limited) or 418 (IP ban), pause all API calls for the server's Retry-After."""
+        if getattr(e, "status_code", None) not in (418, 429):
+            return
+        response = getattr(e, "response", None)
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = DEFAULT_RATE_LIMIT_BACKOFF_SECONDS
+        with self._pause_lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        log.warning(f"Binance returned {e.status_code}; pausing all API calls for {delay:.0f}s.")
+
+    def pause_remaining(self) -> float:
+        """Seconds left in the shared rate-limit backoff (0.0 when calls are allowed)."""
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def _can_call(self) -> bool:
+        """True when the client is ready and not inside a rate-limit backoff."""
+        if self.client is None:
+            return False
+        if self.pause_remaining() > 0:
+            log.debug("Skipping Binance call during rate-limit backoff.")
+            return False
+        return True
+
+    def add_user_event_listener(self, callback: Callable[[Dict[str, Any]], None]) -> bool:
+        """Subscribes to the account's user data stream (executionReport etc.). Returns False if unavailable."""
+        if not self.is_ready(): return False
+        with self._pause_lock:
+            if self._user_stream is None:
+                self._user_stream = UserDataStream(self.api_key, self.secret_key)
+        return self._user_stream.add_listener(callback)
+
+    def remove_user_event_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        if self._user_stream is not None:
+            self._user_stream.remove_listener(callback)
+
     def get_symbol_ticker(self, symbol: str) -> Optional[Dict[str, Any]]:
         """Gets the latest price ticker for a symbol."""
-        if not self.is_ready(): return None
+        if not self._can_call(): return None
         try:
             ticker = self.client.get_symbol_ticker(symbol=symbol)
             log.debug(f"Ticker for {symbol}: {ticker}")
             return ticker
         except BinanceAPIException as e:
+            self._note_rate_limit(e)
             log.error(f"Binance API error getting ticker for {symbol}: {e}")
             return None
         except Exception as e:
             log.exception(f"Unexpected error getting ticker for {symbol}: {e}")
             return None
 
+    @staticmethod
+    def _parse_symbol_filters(symbol_info: Dict[str, Any]) -> Dict[str, Decimal]:
+        """Extracts tick size, lot step, min quantity and min notional from an exchangeInfo symbol entry."""
+        filters = {f.get("filterType"): f for f in symbol_info.get("filters", [])}
+        notional = filters.get("NOTIONAL") or filters.get("MIN_NOTIONAL") or {}
+        return {
+            "tick_size": Decimal(filters.get("PRICE_FILTER", {}).get("tickSize", "0")),
+            "step_size": Decimal(filters.get("LOT_SIZE", {}).get("stepSize", "0")),
+            "min_qty": Decimal(filters.get("LOT_SIZE", {}).get("minQty", "0")),
+            "min_notional": Decimal(notional.get("minNotional", "0")),
+        }
+
+    def get_symbol_filters(self, symbol: str) -> Optional[Dict[str, Decimal]]:
+        """
+        Trading filters for a symbol (tick_size, step_size, min_qty, min_notional), or None if unavailable.
+        A cache miss fetches exchangeInfo for all symbols once and caches every entry for SYMBOL_INFO_TTL_SECONDS,
+        so agents starting on any symbol share that single request.
+        """
+        with self._symbol_filters_lock:
+            filters = self._symbol_filters.get(symbol)
+        if filters is not None or not self._can_call():
+            return filters or None # {} marks a symbol exchangeInfo doesn't list
+
+        # Fetch and parse outside the lock so a slow request doesn't block cache hits for other symbols;
+        # concurrent misses may fetch twice, which is harmless
+        try:
+            exchange_info = self.client.get_exchange_info()
+        except BinanceAPIException as e:
+            self._note_rate_limit(e)
+            log.error(f"Binance API error getting exchange info: {e}")
+            return None
+        except Exception as e:
+            log.exception(f"Unexpected error getting exchange info: {e}")
+            return None
+        parsed: Dict[str, Dict[str, Decimal]] = {}
+        for symbol_info in exchange_info.get("symbols", []):
+            try:
+                parsed[symbol_info["symbol"]] = self._parse_symbol_filters(symbol_info)
+            except Exception as e: # One malformed entry shouldn't drop the rest
+                log.warning(f"Skipping symbol info for {symbol_info.get('symbol')}: {e}")
+        parsed.setdefault(symbol, {})
+
+        with self._symbol_filters_lock:
+            self._symbol_filters.update(parsed)
+        log.info(f"Cached trading filters for {len(parsed)} symbols.")
+        return parsed[symbol] or None
+
     def get_current_price(self, symbol: str) -> Optional[float]:
         """Gets the current price for a symbol."""
         ticker = self.get_symbol_ticker(symbol)
@@ -61,12 +206,19 @@ class BinanceClientWrapper:
                 return None
         return None
 
-    def create_limit_order(self, symbol: str, side: str, quantity: float, price: float) -> Optional[Dict[str, Any]]:
-        """Creates a limit order (BUY or SELL)."""
-        if not self.is_ready(): return None
+    def create_limit_order(self, symbol: str, side: str, quantity: Union[str, Decimal], price: Union[str, Decimal]) -> Optional[Dict[str, Any]]:
+        """
+        Creates a limit order (BUY or SELL). Quantity and price go on the wire as decimal strings:
+        strings are sent verbatim, Decimals are written in plain notation (never via float).
+        """
+        if not self._can_call(): return None
         try:
             # Format price and quantity according to symbol filters (precision, min/max qty) - IMPORTANT for production
             # For MVP, we assume parameters are pre-validated/formatted
+            if isinstance(quantity, Decimal): quantity = format(quantity, 'f')
+            if isinstance(price, Decimal): price = format(price, 'f')
+            self._order_bucket.acquire() # Stay under the exchange's order rate instead of tripping a 429
+            if not self._can_call(): return None # A backoff may have started while waiting
             log.info(f"Placing limit order: {side} {quantity} {symbol} @ {price}")
             order = self.client.create_order(
                 symbol=symbol,
@@ -74,11 +226,12 @@ class BinanceClientWrapper:
                 type=Client.ORDER_TYPE_LIMIT,
                 timeInForce=Client.TIME_IN_FORCE_GTC, # Good 'Til Canceled
                 quantity=quantity,
-                price=f'{price:.8f}' # Format price string appropriately
+                price=price
             )
             log.info(f"Order placed successfully: {order}")
             return order
         except BinanceAPIException as e:
+            self._note_rate_limit(e)
             log.error(f"Binance API error creating order ({side} {quantity} {symbol} @ {price}): {e}")
             return None
         except BinanceOrderException as e:
@@ -88,30 +241,62 @@ class BinanceClientWrapper:
             log.exception(f"Unexpected error creating order: {e}")
             return None
 
-    def get_open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Gets open orders for a specific symbol or all symbols."""
-        if not self.is_ready(): return []
+    def create_limit_orders(self, orders: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Places many limit orders concurrently (up to BINANCE_ORDER_CONCURRENCY in flight), so a grid of N
+        orders costs about N / concurrency round trips instead of N. Each item holds create_limit_order's
+        keyword arguments (symbol, side, quantity, price). Results are in input order; None marks a failure.
+        """
+        if not orders or not self._can_call():
+            return [None] * len(orders)
+        if self._order_executor is None:
+            with self._pause_lock:
+                if self._order_executor is None:
+                    self._order_executor = ThreadPoolExecutor(max_workers=BINANCE_ORDER_CONCURRENCY, thread_name_prefix="BinanceOrder")
+        futures = [self._order_executor.submit(self.create_limit_order, **order) for order in orders]
+        return [future.result() for future in futures]
+
+    def get_order(self, symbol: str, order_id: str) -> Optional[Dict[str, Any]]:
+        """Gets the current state of one order (status, executedQty, ...)."""
+        if not self._can_call(): return None
+        try:
+            order = self.client.get_order(symbol=symbol, orderId=order_id)
+            log.debug(f"Order {order_id} for {symbol}: {order.get('status')}")
+            return order
+        except BinanceAPIException as e:
+            self._note_rate_limit(e)
+            log.error(f"Binance API error getting order {order_id} for {symbol}: {e}")
+            return None
+        except Exception as e:
+            log.exception(f"Unexpected error getting order {order_id}: {e}")
+            return None
+
+    def get_open_orders(self, symbol: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """Gets open orders for a specific symbol or all symbols (None if the request failed, [] if there are none)."""
+        if not self._can_call(): return None
         try:
             params = {"symbol": symbol} if symbol else {}
             open_orders = self.client.get_open_orders(**params)
             log.debug(f"Found {len(open_orders)} open orders for {symbol or 'all symbols'}.")
             return open_orders
         except BinanceAPIException as e:
+            self._note_rate_limit(e)
             log.error(f"Binance API error getting open orders for {symbol or 'all symbols'}: {e}")
-            return []
+            return None
         except Exception as e:
             log.exception(f"Unexpected error getting open orders: {e}")
-            return []
+            return None
 
     def cancel_order(self, symbol: str, order_id: str) -> Optional[Dict[str, Any]]:
         """Cancels an existing order."""
-        if not self.is_ready(): return None
+        if not self._can_call(): return None
         try:
             log.info(f"Cancelling order: {symbol} / {order_id}")
             result = self.client.cancel_order(symbol=symbol, orderId=order_id)
             log.info(f"Order cancellation result: {result}")
             return result
         except BinanceAPIException as e:
+            self._note_rate_limit(e)
             log.error(f"Binance API error cancelling order {order_id} for {symbol}: {e}")
             # Check if error indicates order already filled/cancelled
             if e.code == -2011: # Order filled or cancelled code
@@ -126,14 +311,37 @@ class BinanceClientWrapper:
             log.exception(f"Unexpected error cancelling order: {e}")
             return None
 
+    def cancel_all_open_orders(self, symbol: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Cancels every open order on `symbol` for the account in one request (DELETE /api/v3/openOrders).
+        Returns the cancelled orders ([] if there were none), or None if the request failed.
+        """
+        if not self._can_call(): return None
+        try:
+            log.info(f"Cancelling all open orders for {symbol}")
+            result = self.client.cancel_all_open_orders(symbol=symbol)
+            log.info(f"Cancelled {len(result)} open orders for {symbol}")
+            return result
+        except BinanceAPIException as e:
+            self._note_rate_limit(e)
+            if e.code == -2011: # Unknown order: nothing was open
+                log.info(f"No open orders to cancel for {symbol}")
+                return []
+            log.error(f"Binance API error cancelling all open orders for {symbol}: {e}")
+            return None
+        except Exception as e:
+            log.exception(f"Unexpected error cancelling all open orders for {symbol}: {e}")
+            return None
+
     def get_asset_balance(self, asset: str) -> Optional[Dict[str, Any]]:
         """Gets the balance for a specific asset."""
-        if not self.is_ready(): return None
+        if not self._can_call(): return None
         try:
             balance = self.client.get_asset_balance(asset=asset)
             log.debug(f"Balance for {asset}: {balance}")
             return balance
         except BinanceAPIException as e:
+            self._note_rate_limit(e)
             log.error(f"Binance API error getting balance for {asset}: {e}")
             return None
         except Exception as e:
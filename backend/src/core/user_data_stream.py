@@ -0,0 +1,64 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from binance import ThreadedWebsocketManager
+
+log = logging.getLogger(__name__)
+
+class UserDataStream:
+    """
+    The account's Binance User Data Stream, shared by every agent using the same API key.
+    One websocket (python-binance's ThreadedWebsocketManager, which also keeps the listenKey alive)
+    receives executionReport/balance events and fans them out to the registered listeners.
+    Listeners run on the websocket thread and must return quickly.
+    """
+
+    def __init__(self, api_key: str, api_secret: str):
+        self._api_key = api_key
+        self._api_secret = api_secret
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+        self._twm: Optional[ThreadedWebsocketManager] = None
+        self._stream_name: Optional[str] = None
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]) -> bool:
+        """Registers a listener, starting the stream on first use. Returns False if the stream could not start."""
+        with self._lock:
+            if self._twm is None:
+                try:
+                    self._twm = ThreadedWebsocketManager(api_key=self._api_key, api_secret=self._api_secret)
+                    self._twm.start()
+                    self._stream_name = self._twm.start_user_socket(callback=self._dispatch)
+                    log.info("User data stream started.")
+                except Exception as e:
+                    log.exception("Failed to start user data stream: %s", e)
+                    self._twm = None
+                    return False
+            self._listeners.append(callback)
+            return True
+
+    def remove_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """Unregisters a listener; the stream is closed with the last one."""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+            if self._listeners or self._twm is None:
+                return
+            twm, self._twm = self._twm, None
+        try:
+            twm.stop()
+            log.info("User data stream stopped.")
+        except Exception as e:
+            log.error("Error stopping user data stream: %s", e)
+
+    def _dispatch(self, message: Dict[str, Any]):
+        if message.get("e") == "error":
+            log.error("User data stream error: %s", message.get("m"))
+            return
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(message)
+            except Exception as e:
+                log.exception("User data stream listener failed: %s", e)
@@ -3,7 +3,6 @@ from google.api_core import exceptions as google_api_exceptions
 import os
 import json
 import logging
-import inspect # To check function signature for 'db' parameter
 from dotenv import load_dotenv
 from typing import Dict, Any, List
 import asyncio
@@ -39,6 +38,13 @@ model = genai.GenerativeModel(
     # tools=get_tool_definitions() # Temporarily disabled
 )
 
+# Names of tools whose positional/keyword parameters include 'db'. Computed once from the code
+# objects (much cheaper than inspect.signature, which was previously evaluated on every call).
+TOOLS_REQUIRING_DB = frozenset(
+    name for name, func in AVAILABLE_FUNCTIONS.items()
+    if 'db' in func.__code__.co_varnames[:func.__code__.co_argcount + func.__code__.co_kwonlyargcount]
+)
+
 # --- Interaction Logic ---
 
 async def process_natural_language_request(user_prompt: str) -> Dict[str, Any]:
@@ -97,11 +103,10 @@ async def process_natural_language_request(user_prompt: str) -> Dict[str, Any]:
             # --- Execute the Function ---
             db_session: Optional[Session] = None
             try:
-                tool_function = AVAILABLE_TOOLS[tool_name]
-                tool_signature = inspect.signature(tool_function)
+                tool_function = AVAILABLE_FUNCTIONS[tool_name]
 
-                # Check if the tool requires a 'db' argument
-                requires_db = 'db' in tool_signature.parameters
+                # Check if the tool requires a 'db' argument (precomputed at import)
+                requires_db = tool_name in TOOLS_REQUIRING_DB
 
                 call_args = tool_args.copy() # Use provided args
 
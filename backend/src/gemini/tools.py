@@ -1,7 +1,11 @@
 import json
 import logging
-from typing import Dict, List, Any, Literal, Optional
+from typing import Dict, List, Any, Literal, Optional, Deque
+from collections import deque
 import time # For uptime calculation
+import threading
+import functools
+from cachetools import TTLCache # Short-lived cache for repeated read-only tool calls
 from pydantic import BaseModel, ValidationError, Field # For validation
 from sqlalchemy.orm import Session # To type hint DB session
 
@@ -11,8 +15,9 @@ from ..persistence.models import AgentStatusEnum, StrategyTypeEnum
 # Import agent manager (still used for runtime state)
 from ..core import agent_manager
 
-# Configure basic logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Logging is configured once by the app entrypoint (api/main.py); use %-style args so
+# messages are only formatted when the record is actually emitted.
+log = logging.getLogger(__name__)
 
 # --- Pydantic Models for Config Validation ---
 # Define models to validate the 'config' dict passed to create_agent
@@ -36,17 +41,73 @@ class GridConfigModel(BaseModel):
         if self.lower_price >= self.upper_price:
             raise ValueError("lower_price must be less than upper_price")
 
+# --- Response Templates ---
+# Pre-shaped dicts for hot read-only tools (dashboard polling). Callers must .copy() before filling.
+# Only always-present keys are templated; optional ones (uptime_hours, message) are added when
+# applicable, so the tool's response shape is unchanged.
+_STATUS_TEMPLATE: Dict[str, Any] = {
+    "agent_id": None, "name": None, "strategy": None, "status": None,
+    "config_summary": None, "current_pnl_usd": None,
+}
+
+# --- Read-Only Tool Result Cache ---
+# The LLM tends to re-issue identical read-only tool calls within seconds (and dashboards poll).
+# Results are cached briefly, keyed by (tool_name, agent_id); the DB session is never part of the key.
+# State-modifying tools invalidate the affected entries. TTLCache is not thread-safe, hence the lock.
+_TOOL_CACHE_TTL_SECONDS = 2.0
+_tool_cache: TTLCache = TTLCache(maxsize=1024, ttl=_TOOL_CACHE_TTL_SECONDS)
+_tool_cache_lock = threading.Lock()
+
+def _cache_get(key: tuple) -> Optional[Any]:
+    with _tool_cache_lock:
+        return _tool_cache.get(key)
+
+def _cache_set(key: tuple, value: Any) -> None:
+    with _tool_cache_lock:
+        _tool_cache[key] = value
+
+def _invalidate_agent_cache(agent_id: Optional[int] = None) -> None:
+    """Drops cached results for an agent (if given) and the agent list."""
+    with _tool_cache_lock:
+        _tool_cache.pop(("list_trading_agents", None), None)
+        if agent_id is not None:
+            _tool_cache.pop(("get_pnl_summary", agent_id), None)
+
 # --- Helper Function for Error Responses ---
 # Keep this as is, but note agent_id might be the DB int ID now in some contexts
 def _error_response(agent_id: Optional[Any], message: str, status_code: int = 400) -> Dict[str, Any]:
     """Standardized error response format."""
-    logging.warning(f"Tool Error (Agent ID: {agent_id}): {message}")
+    log.warning("Tool Error (Agent ID: %s): %s", agent_id, message)
     response = {"status": "error", "message": message}
     if agent_id is not None: # Check explicitly for None
         response["agent_id"] = agent_id # Return the ID passed, could be int or other identifier
     # status_code is for potential internal use or logging, not directly returned by tool usually
     return response
 
+# Constant-message errors hit repeatedly while the LLM polls stopped/unknown agents.
+# Their responses are built once per (agent_id, code); callers get a shallow copy, so annotating a
+# response (e.g. when building the model's function response) can't leak into later calls.
+_ERROR_MESSAGES: Dict[str, str] = {
+    "not_found": "Agent not found.",
+    "already_running": "Agent is already running.",
+}
+
+@functools.lru_cache(maxsize=512)
+def _cached_error(agent_id: Optional[Any], code: str) -> Dict[str, Any]:
+    response = {"status": "error", "message": _ERROR_MESSAGES[code]}
+    if agent_id is not None:
+        response["agent_id"] = agent_id
+    return response
+
+def _err(agent_id: Optional[Any], code: str) -> Dict[str, Any]:
+    """Returns the error response for a constant-message error code (see _ERROR_MESSAGES)."""
+    log.warning("Tool Error (Agent ID: %s): %s", agent_id, _ERROR_MESSAGES[code])
+    return dict(_cached_error(agent_id, code))
+
+def _ok(agent_id: Any, **fields: Any) -> Dict[str, Any]:
+    """Standardized success response: agent_id first, followed by tool-specific fields."""
+    return {"agent_id": agent_id, **fields}
+
 
 # --- Agent Management Tools (Updated for DB & Groups) ---
 # These functions will be called by the interaction layer,
@@ -72,7 +133,7 @@ def create_trading_agent(
     Returns:
         A dictionary with agent_id, status, and message.
     """
-    logging.info(f"Tool Call: create_trading_agent(name='{name}', strategy='{strategy_type}', group_id={group_id})")
+    log.info("Tool Call: create_trading_agent(name='%s', strategy='%s', group_id=%s)", name, strategy_type, group_id)
     db: Session = next(database.get_db()) # Create session internally for execution
     try:
         # --- Input Validation & Sanitization ---
@@ -93,7 +154,8 @@ def create_trading_agent(
         db_agent = crud.create_agent(
             db, name=name, strategy_type=db_strategy_type, config=config, group_id=group_id
         )
-        logging.info(f"Agent '{name}' created with DB ID: {db_agent.id}, GroupID: {group_id}")
+        log.info("Agent '%s' created with DB ID: %s, GroupID: %s", name, db_agent.id, group_id)
+        _invalidate_agent_cache()
         return {
             "agent_id": db_agent.id,
             "status": "created",
@@ -107,7 +169,7 @@ def create_trading_agent(
     except ValueError as e:
          return _error_response(None, str(e))
     except Exception as e:
-        logging.exception(f"Error in create_trading_agent: {e}")
+        log.exception("Error in create_trading_agent: %s", e)
         return _error_response(None, f"An unexpected error occurred: {str(e)}", 500)
     finally:
          if db: db.close() # Ensure session is closed
@@ -128,17 +190,17 @@ def start_trading_agent(agent_id: int) -> Dict[str, Any]:
      Args:
         agent_id: The database ID of the agent to start.
     """
-    logging.info(f"Tool Call: start_trading_agent(agent_id={agent_id})")
+    log.info("Tool Call: start_trading_agent(agent_id=%s)", agent_id)
     db: Session = next(database.get_db())
     try:
         db_agent = crud.get_agent_by_id(db, agent_id)
         if not db_agent:
-            return _error_response(agent_id, "Agent not found.")
+            return _err(agent_id, "not_found")
 
         if db_agent.status == AgentStatusEnum.RUNNING:
-             return _error_response(agent_id, "Agent is already running.")
+             return _err(agent_id, "already_running")
         if agent_manager.is_agent_running(str(agent_id)):
-             logging.warning(f"Inconsistency: Agent manager shows {agent_id} running, but DB status is {db_agent.status.value}")
+             log.warning("Inconsistency: Agent manager shows %s running, but DB status is %s", agent_id, db_agent.status.value)
              crud.update_agent_status(db, agent_id, AgentStatusEnum.RUNNING, "Status corrected from manager state")
              return _error_response(agent_id, "Agent is already running (status corrected).")
 
@@ -149,17 +211,18 @@ def start_trading_agent(agent_id: int) -> Dict[str, Any]:
         )
         if success:
             crud.update_agent_status(db, agent_id, AgentStatusEnum.STARTING)
-            logging.info(f"Agent {agent_id} start initiated.")
-            return {"agent_id": agent_id, "status": AgentStatusEnum.STARTING.value, "message": f"Agent {agent_id} start initiated."}
+            _invalidate_agent_cache(agent_id)
+            log.info("Agent %s start initiated.", agent_id)
+            return _ok(agent_id, status=AgentStatusEnum.STARTING.value, message=f"Agent {agent_id} start initiated.")
         else:
             current_status = crud.get_agent_by_id(db, agent_id).status.value
             return _error_response(agent_id, f"Failed to initiate agent start via manager (current DB status: {current_status}).")
     except Exception as e:
-        logging.exception(f"Error in start_trading_agent for {agent_id}: {e}")
+        log.exception("Error in start_trading_agent for %s: %s", agent_id, e)
         try:
             crud.update_agent_status(db, agent_id, AgentStatusEnum.ERROR, f"Failed to start: {str(e)}")
         except Exception as db_err:
-             logging.error(f"Failed to update agent {agent_id} status to ERROR after start failure: {db_err}")
+             log.error("Failed to update agent %s status to ERROR after start failure: %s", agent_id, db_err)
         return _error_response(agent_id, f"An unexpected error occurred: {str(e)}", 500)
     finally:
          if db: db.close()
@@ -173,30 +236,34 @@ def stop_trading_agent(agent_id: int) -> Dict[str, Any]:
      Args:
         agent_id: The database ID of the agent to stop.
     """
-    logging.info(f"Tool Call: stop_trading_agent(agent_id={agent_id})")
+    log.info("Tool Call: stop_trading_agent(agent_id=%s)", agent_id)
     db: Session = next(database.get_db())
     try:
         db_agent = crud.get_agent_by_id(db, agent_id)
         if not db_agent:
-            return _error_response(agent_id, "Agent not found.")
+            return _err(agent_id, "not_found")
 
         can_stop_status = [AgentStatusEnum.RUNNING, AgentStatusEnum.STARTING, AgentStatusEnum.ERROR]
         if db_agent.status not in can_stop_status:
              if not agent_manager.is_agent_running(str(agent_id)):
                  return _error_response(agent_id, f"Agent is not in a stoppable state (status: {db_agent.status.value}).")
              else:
-                 logging.warning(f"Inconsistency: Agent manager shows {agent_id} running, but DB status is {db_agent.status.value}. Proceeding with stop.")
+                 log.warning("Inconsistency: Agent manager shows %s running, but DB status is %s. Proceeding with stop.", agent_id, db_agent.status.value)
 
+        # STOPPING goes first: the strategy's run loop writes (and flushes) STOPPED while stop_agent_process waits
+        prev_status, prev_message = db_agent.status, db_agent.status_message
+        crud.update_agent_status(db, agent_id, AgentStatusEnum.STOPPING)
+        _invalidate_agent_cache(agent_id)
         success = agent_manager.stop_agent_process(str(agent_id))
         if success:
-            crud.update_agent_status(db, agent_id, AgentStatusEnum.STOPPING)
-            logging.info(f"Agent {agent_id} stop initiated.")
-            return {"agent_id": agent_id, "status": AgentStatusEnum.STOPPING.value, "message": f"Agent {agent_id} stop initiated."}
+            log.info("Agent %s stop initiated.", agent_id)
+            return _ok(agent_id, status=AgentStatusEnum.STOPPING.value, message=f"Agent {agent_id} stop initiated.")
         else:
-            current_status = crud.get_agent_by_id(db, agent_id).status.value
+            crud.update_agent_status(db, agent_id, prev_status, prev_message)
+            current_status = prev_status.value
             return _error_response(agent_id, f"Failed to initiate agent stop via manager (current DB status: {current_status}). It might not be running according to the manager.")
     except Exception as e:
-        logging.exception(f"Error in stop_trading_agent for {agent_id}: {e}")
+        log.exception("Error in stop_trading_agent for %s: %s", agent_id, e)
         return _error_response(agent_id, f"An unexpected error occurred: {str(e)}", 500)
     finally:
          if db: db.close()
@@ -210,35 +277,37 @@ def get_agent_status(agent_id: int) -> Dict[str, Any]:
      Args:
         agent_id: The database ID of the agent to query.
     """
-    logging.info(f"Tool Call: get_agent_status(agent_id={agent_id})")
+    log.info("Tool Call: get_agent_status(agent_id=%s)", agent_id)
     db: Session = next(database.get_db())
     try:
         db_agent = crud.get_agent_by_id(db, agent_id)
         if not db_agent:
-            return _error_response(agent_id, "Agent not found.", 404)
+            return _err(agent_id, "not_found")
 
         agent_status = db_agent.status
         agent_status_message = db_agent.status_message
 
         is_running_in_manager = agent_manager.is_agent_running(str(agent_id))
         if agent_status == AgentStatusEnum.RUNNING and not is_running_in_manager:
-            logging.warning(f"Status Inconsistency: Agent {agent_id} has DB status 'running' but not found in agent manager. Updating status to 'error'.")
+            log.warning("Status Inconsistency: Agent %s has DB status 'running' but not found in agent manager. Updating status to 'error'.", agent_id)
             updated_agent = crud.update_agent_status(db, agent_id, AgentStatusEnum.ERROR, "Agent process not found by manager")
             if updated_agent:
                 agent_status = updated_agent.status
                 agent_status_message = updated_agent.status_message
         elif agent_status != AgentStatusEnum.RUNNING and is_running_in_manager:
-             logging.warning(f"Status Inconsistency: Agent {agent_id} has DB status '{agent_status.value}' but IS found in agent manager. Updating status to 'running'.")
+             log.warning("Status Inconsistency: Agent %s has DB status '%s' but IS found in agent manager. Updating status to 'running'.", agent_id, agent_status.value)
              updated_agent = crud.update_agent_status(db, agent_id, AgentStatusEnum.RUNNING, "Status corrected from manager state")
              if updated_agent:
                  agent_status = updated_agent.status
                  agent_status_message = updated_agent.status_message
 
-        response = {
-            "agent_id": db_agent.id, "name": db_agent.name,
-            "strategy": db_agent.strategy_type.value, "status": agent_status.value,
-            "config_summary": db_agent.config,
-        }
+        # Fixed-shape response: copy the template so every call allocates a presized dict
+        response = _STATUS_TEMPLATE.copy()
+        response["agent_id"] = db_agent.id
+        response["name"] = db_agent.name
+        response["strategy"] = db_agent.strategy_type.value
+        response["status"] = agent_status.value
+        response["config_summary"] = db_agent.config
         if agent_status == AgentStatusEnum.RUNNING:
              run_info = agent_manager.get_running_agent_info(str(agent_id))
              if run_info and run_info.get("start_time"):
@@ -250,7 +319,7 @@ def get_agent_status(agent_id: int) -> Dict[str, Any]:
         if agent_status_message: response["message"] = agent_status_message
         return response
     except Exception as e:
-        logging.exception(f"Error in get_agent_status for {agent_id}: {e}")
+        log.exception("Error in get_agent_status for %s: %s", agent_id, e)
         return _error_response(agent_id, f"An unexpected error occurred: {str(e)}", 500)
     finally:
          if db: db.close()
@@ -261,7 +330,11 @@ def list_trading_agents() -> List[Dict[str, Any]]:
     Lists all configured trading agents and their basic status. (Read-Only)
     Reads data from the database.
     """
-    logging.info(f"Tool Call: list_trading_agents()")
+    log.info("Tool Call: list_trading_agents()")
+    cache_key = ("list_trading_agents", None)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
     db: Session = next(database.get_db())
     try:
         db_agents = crud.get_agents(db, limit=500)
@@ -269,9 +342,10 @@ def list_trading_agents() -> List[Dict[str, Any]]:
             {"agent_id": agent.id, "name": agent.name, "strategy": agent.strategy_type.value, "status": agent.status.value}
             for agent in db_agents
         ]
+        _cache_set(cache_key, agent_list)
         return agent_list
     except Exception as e:
-        logging.exception(f"Error in list_trading_agents: {e}")
+        log.exception("Error in list_trading_agents: %s", e)
         return []
     finally:
          if db: db.close()
@@ -285,32 +359,33 @@ def delete_trading_agent(agent_id: int) -> Dict[str, Any]:
      Args:
         agent_id: The database ID of the agent to delete.
     """
-    logging.info(f"Tool Call: delete_trading_agent(agent_id={agent_id})")
+    log.info("Tool Call: delete_trading_agent(agent_id=%s)", agent_id)
     db: Session = next(database.get_db())
     try:
         db_agent = crud.get_agent_by_id(db, agent_id)
         if not db_agent:
-            return _error_response(agent_id, "Agent not found.", 404)
+            return _err(agent_id, "not_found")
 
         agent_status = db_agent.status
         is_running = agent_manager.is_agent_running(str(agent_id))
         if agent_status == AgentStatusEnum.RUNNING or is_running:
-            logging.info(f"Agent {agent_id} is running or managed as running. Attempting to stop before deletion.")
+            log.info("Agent %s is running or managed as running. Attempting to stop before deletion.", agent_id)
+            crud.update_agent_status(db, agent_id, AgentStatusEnum.STOPPING) # Before the stop, which flushes STOPPED
             stop_success = agent_manager.stop_agent_process(str(agent_id))
             if not stop_success:
-                 logging.warning(f"Attempted to stop agent {agent_id} before deletion, but stop command failed.")
+                 log.warning("Attempted to stop agent %s before deletion, but stop command failed.", agent_id)
             else:
-                 crud.update_agent_status(db, agent_id, AgentStatusEnum.STOPPING)
-                 logging.info(f"Stop initiated for agent {agent_id}. Proceeding with deletion.")
+                 log.info("Stop initiated for agent %s. Proceeding with deletion.", agent_id)
 
         deleted = crud.delete_agent(db, agent_id)
+        _invalidate_agent_cache(agent_id)
         if deleted:
-            logging.info(f"Agent {agent_id} data successfully deleted from DB.")
-            return {"agent_id": agent_id, "deleted": True, "message": f"Agent {agent_id} successfully deleted."}
+            log.info("Agent %s data successfully deleted from DB.", agent_id)
+            return _ok(agent_id, deleted=True, message=f"Agent {agent_id} successfully deleted.")
         else:
             return _error_response(agent_id, "Agent found initially but failed to delete from database.", 500)
     except Exception as e:
-        logging.exception(f"Error in delete_trading_agent for {agent_id}: {e}")
+        log.exception("Error in delete_trading_agent for %s: %s", agent_id, e)
         return _error_response(agent_id, f"An unexpected error occurred: {str(e)}", 500)
     finally:
          if db: db.close()
@@ -324,38 +399,43 @@ def get_detailed_performance(
 ) -> Dict[str, Any]:
     """
     Fetches detailed performance for a specific agent. (Read-Only)
-    Retrieves trade history from DB and calculates KPIs (placeholders).
+    Retrieves trade history from DB and calculates KPIs (total PnL, win rate, Sharpe).
 
      Args:
         agent_id: The database ID of the agent.
         time_period: The time period for performance data.
     """
-    logging.info(f"Tool Call: get_detailed_performance(agent_id={agent_id}, period='{time_period}')")
+    log.info("Tool Call: get_detailed_performance(agent_id=%s, period='%s')", agent_id, time_period)
     db: Session = next(database.get_db())
     try:
         db_agent = crud.get_agent_by_id(db, agent_id)
         if not db_agent:
-            return _error_response(agent_id, "Agent not found.", 404)
-
-        trades = crud.get_trades_for_agent(db, agent_id, limit=5000)
-        total_pnl = sum(t.pnl_usd for t in trades if t.pnl_usd is not None)
-        total_trades = len(trades)
-        winning_trades = sum(1 for t in trades if t.pnl_usd is not None and t.pnl_usd > 0)
-        win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
+            return _err(agent_id, "not_found")
+
+        # Single streamed pass: count trades, collect PnLs and keep only the 50 trades we display
+        total_trades = 0
+        pnl_values: List[float] = []
+        tail: Deque[models.Trade] = deque(maxlen=50)
+        for t in crud.iter_trades_for_agent(db, agent_id, limit=5000):
+            total_trades += 1
+            if t.pnl_usd is not None:
+                pnl_values.append(t.pnl_usd)
+            tail.append(t)
+        stats = crud.calculate_pnl_statistics(pnl_values, total_trades)
         trade_list = [
             {"timestamp": t.timestamp.isoformat(), "symbol": t.symbol, "side": t.side, "price": t.price, "quantity": t.quantity, "order_id": t.order_id, "pnl_usd": t.pnl_usd}
-            for t in trades[-50:]
+            for t in tail
         ]
-        if not trades and db_agent.status != AgentStatusEnum.RUNNING:
-             return {"agent_id": agent_id, "time_period": time_period, "message": "No trade data found. Agent is not running.", "trades": []}
+        if not total_trades and db_agent.status != AgentStatusEnum.RUNNING:
+             return _ok(agent_id, time_period=time_period, message="No trade data found. Agent is not running.", trades=[])
         return {
             "agent_id": agent_id, "time_period": time_period,
-            "total_pnl_usd": round(total_pnl, 2), "win_rate_pct": round(win_rate, 1),
-            "total_trades": total_trades, "sharpe_ratio": 0.0, # Placeholder
+            "total_pnl_usd": round(stats["total_pnl_usd"], 2), "win_rate_pct": round(stats["win_rate_pct"], 1),
+            "total_trades": total_trades, "sharpe_ratio": round(stats["sharpe_ratio"], 2),
             "trades": trade_list, "message": f"Displaying last {len(trade_list)} of {total_trades} trades." if total_trades > 50 else None
         }
     except Exception as e:
-        logging.exception(f"Error in get_detailed_performance for {agent_id}: {e}")
+        log.exception("Error in get_detailed_performance for %s: %s", agent_id, e)
         return _error_response(agent_id, f"An unexpected error occurred: {str(e)}", 500)
     finally:
          if db: db.close()
@@ -369,19 +449,25 @@ def get_pnl_summary(agent_id: int) -> Dict[str, Any]:
      Args:
         agent_id: The database ID of the agent.
     """
-    logging.info(f"Tool Call: get_pnl_summary(agent_id={agent_id})")
+    log.info("Tool Call: get_pnl_summary(agent_id=%s)", agent_id)
+    cache_key = ("get_pnl_summary", agent_id)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
     db: Session = next(database.get_db())
     try:
         db_agent = crud.get_agent_by_id(db, agent_id)
         if not db_agent:
-            return _error_response(agent_id, "Agent not found.", 404)
+            return _err(agent_id, "not_found")
 
         summary = crud.calculate_agent_pnl_summary(db, agent_id)
         if not summary:
              return _error_response(agent_id, "Could not calculate PnL summary.")
-        return {"agent_id": agent_id, **summary}
+        result = {"agent_id": agent_id, **summary}
+        _cache_set(cache_key, result) # Only successful results are cached
+        return result
     except Exception as e:
-        logging.exception(f"Error in get_pnl_summary for {agent_id}: {e}")
+        log.exception("Error in get_pnl_summary for %s: %s", agent_id, e)
         return _error_response(agent_id, f"An unexpected error occurred: {str(e)}", 500)
     finally:
          if db: db.close()
@@ -391,7 +477,7 @@ def get_pnl_summary(agent_id: int) -> Dict[str, Any]:
 
 def create_agent_group(name: str, description: Optional[str] = None) -> Dict[str, Any]:
     """Creates a new group for organizing agents."""
-    logging.info(f"Tool Call: create_agent_group(name='{name}')")
+    log.info("Tool Call: create_agent_group(name='%s')", name)
     db: Session = next(database.get_db())
     try:
         db_group = crud.create_agent_group(db, name=name, description=description)
@@ -399,59 +485,61 @@ def create_agent_group(name: str, description: Optional[str] = None) -> Dict[str
     except ValueError as e:
         return _error_response(None, str(e), 409)
     except Exception as e:
-        logging.exception(f"Error creating agent group '{name}': {e}")
+        log.exception("Error creating agent group '%s': %s", name, e)
         return _error_response(None, f"An unexpected error occurred: {str(e)}", 500)
     finally:
          if db: db.close()
 
 def get_agent_groups() -> List[Dict[str, Any]]:
     """Lists all available agent groups."""
-    logging.info("Tool Call: get_agent_groups()")
+    log.info("Tool Call: get_agent_groups()")
     db: Session = next(database.get_db())
     try:
         groups = crud.get_agent_groups(db, limit=500)
         return [{"group_id": g.id, "name": g.name, "description": g.description} for g in groups]
     except Exception as e:
-        logging.exception(f"Error listing agent groups: {e}")
+        log.exception("Error listing agent groups: %s", e)
         return []
     finally:
          if db: db.close()
 
 def assign_agent_to_group(agent_id: int, group_id: int) -> Dict[str, Any]:
     """Assigns an existing agent to an existing group."""
-    logging.info(f"Tool Call: assign_agent_to_group(agent_id={agent_id}, group_id={group_id})")
+    log.info("Tool Call: assign_agent_to_group(agent_id=%s, group_id=%s)", agent_id, group_id)
     db: Session = next(database.get_db())
     try:
         updated_agent = crud.update_agent(db, agent_id=agent_id, group_id=group_id)
         if not updated_agent:
-             return _error_response(agent_id, "Agent not found.", 404)
-        return {"agent_id": agent_id, "group_id": group_id, "message": f"Agent {agent_id} successfully assigned to group {group_id}."}
+             return _err(agent_id, "not_found")
+        agent_manager.notify_group_reassigned(agent_id, group_id)
+        return _ok(agent_id, group_id=group_id, message=f"Agent {agent_id} successfully assigned to group {group_id}.")
     except ValueError as e:
         return _error_response(agent_id, str(e), 404)
     except Exception as e:
-        logging.exception(f"Error assigning agent {agent_id} to group {group_id}: {e}")
+        log.exception("Error assigning agent %s to group %s: %s", agent_id, group_id, e)
         return _error_response(agent_id, f"An unexpected error occurred: {str(e)}", 500)
     finally:
          if db: db.close()
 
 def remove_agent_from_group(agent_id: int) -> Dict[str, Any]:
     """Removes an agent from its current group."""
-    logging.info(f"Tool Call: remove_agent_from_group(agent_id={agent_id})")
+    log.info("Tool Call: remove_agent_from_group(agent_id=%s)", agent_id)
     db: Session = next(database.get_db())
     try:
         updated_agent = crud.update_agent(db, agent_id=agent_id, clear_group=True)
         if not updated_agent:
-             return _error_response(agent_id, "Agent not found.", 404)
-        return {"agent_id": agent_id, "group_id": None, "message": f"Agent {agent_id} successfully removed from its group."}
+             return _err(agent_id, "not_found")
+        agent_manager.notify_group_reassigned(agent_id, None)
+        return _ok(agent_id, group_id=None, message=f"Agent {agent_id} successfully removed from its group.")
     except Exception as e:
-        logging.exception(f"Error removing agent {agent_id} from group: {e}")
+        log.exception("Error removing agent %s from group: %s", agent_id, e)
         return _error_response(agent_id, f"An unexpected error occurred: {str(e)}", 500)
     finally:
          if db: db.close()
 
 def get_group_performance_summary(group_id: int) -> Dict[str, Any]:
     """Retrieves an aggregated performance summary for all agents within a specific group."""
-    logging.info(f"Tool Call: get_group_performance_summary(group_id={group_id})")
+    log.info("Tool Call: get_group_performance_summary(group_id=%s)", group_id)
     db: Session = next(database.get_db())
     try:
         group = crud.get_agent_group_by_id(db, group_id)
@@ -461,7 +549,7 @@ def get_group_performance_summary(group_id: int) -> Dict[str, Any]:
         summary["group_name"] = group.name
         return summary
     except Exception as e:
-        logging.exception(f"Error getting performance summary for group {group_id}: {e}")
+        log.exception("Error getting performance summary for group %s: %s", group_id, e)
         return _error_response(group_id, f"An unexpected error occurred: {str(e)}", 500)
     finally:
          if db: db.close()
@@ -504,15 +592,15 @@ def get_tool_definitions() -> List[callable]:
     ENABLE_STATE_MODIFICATION = True # Keep flag for enabling/disabling
 
     if ENABLE_STATE_MODIFICATION:
-        logging.warning("State-modifying Gemini tools are ENABLED (excluding create_trading_agent).")
+        log.warning("State-modifying Gemini tools are ENABLED (excluding create_trading_agent).")
         final_tools = read_only + state_modifying
     else:
-        logging.warning("State-modifying Gemini tools are DISABLED. Only read-only operations allowed via Gemini.")
+        log.warning("State-modifying Gemini tools are DISABLED. Only read-only operations allowed via Gemini.")
         final_tools = read_only
 
     # Log the excluded tools
     if create_trading_agent not in final_tools:
-         logging.warning("Tool 'create_trading_agent' is excluded from Gemini tools due to schema generation issues.")
+         log.warning("Tool 'create_trading_agent' is excluded from Gemini tools due to schema generation issues.")
 
     return final_tools
 
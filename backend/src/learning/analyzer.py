@@ -1,15 +1,21 @@
 import logging
-from typing import Dict, Any, List, Optional, Tuple # Import Tuple
+from typing import Dict, Any, Optional, Tuple # Import Tuple
+from datetime import datetime, timezone
 from sqlalchemy.orm import Session
-import pandas as pd
-from sklearn.linear_model import LinearRegression # Example ML model
 import numpy as np # For array manipulation
 
-from ..persistence import crud, models
+from ..persistence import crud
 from ..communication.redis_pubsub import CommunicationBus, LEARNING_MODULE_CHANNEL, GROUP_UPDATES_CHANNEL
 
 log = logging.getLogger(__name__)
 
+# Minimal per-trade record used for analysis; NumPy reductions run directly on its contiguous buffer.
+TRADE_DTYPE = np.dtype([('ts', 'datetime64[ns]'), ('pnl', 'f8'), ('agent_id', 'i8')])
+
+def _to_naive_utc(ts: datetime) -> datetime:
+    """datetime64 has no timezone: normalize aware timestamps (PostgreSQL) to naive UTC."""
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo is not None else ts
+
 class PerformanceAnalyzer:
     """
     Placeholder class for analyzing agent/group performance and suggesting improvements.
@@ -20,64 +26,71 @@ class PerformanceAnalyzer:
         self.comm_bus = comm_bus
         log.info("PerformanceAnalyzer initialized.")
 
-    def _get_trade_dataframe(self, agent_id: int, limit: int = 1000) -> Optional[pd.DataFrame]:
-        """Helper to fetch trades and convert to a Pandas DataFrame."""
+    def _get_trade_array(self, agent_id: int, limit: int = 1000) -> Optional[np.ndarray]:
+        """Helper to fetch trades into a TRADE_DTYPE structured array sorted by timestamp."""
         try:
-            trades: List[models.Trade] = crud.get_trades_for_agent(self.db, agent_id, limit=limit)
-            if not trades:
+            # Only trades with PnL are returned, as (timestamp, pnl_usd) tuples
+            rows = crud.get_trade_pnl_rows(self.db, agent_id, limit=limit)
+            if not rows:
                 return None
-            # Convert list of Trade objects to DataFrame
-            trade_data = [
-                {
-                    "timestamp": t.timestamp, "symbol": t.symbol, "side": t.side,
-                    "price": t.price, "quantity": t.quantity, "pnl_usd": t.pnl_usd
-                } for t in trades if t.pnl_usd is not None # Only include trades with PnL for analysis
-            ]
-            if not trade_data: # Check if any trades had PnL
-                 return None
-            df = pd.DataFrame(trade_data)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df = df.sort_values(by='timestamp').set_index('timestamp')
-            return df
+            arr = np.fromiter(
+                ((_to_naive_utc(ts), pnl, agent_id) for ts, pnl in rows),
+                dtype=TRADE_DTYPE, count=len(rows),
+            )
+            arr.sort(order='ts')
+            return arr
         except Exception as e:
             log.exception(f"Error fetching or processing trades for agent {agent_id}: {e}")
             return None
 
     def analyze_agent_performance(self, agent_id: int) -> Tuple[str, Optional[Dict]]:
         """
-        Analyzes individual agent performance using basic ML (Linear Regression on PnL).
+        Analyzes individual agent performance using a basic PnL trend (least-squares line on cumulative PnL).
         Returns analysis summary and optional suggestion.
         """
         log.info(f"Analyzing performance for agent {agent_id}...")
         analysis_summary = f"Analysis for agent {agent_id}: "
         suggestion = None
 
-        df = self._get_trade_dataframe(agent_id, limit=500) # Get recent trades with PnL
-
-        if df is None or df.empty:
-            analysis_summary += "No recent trade data with PnL found for analysis."
-            log.warning(analysis_summary)
-            return analysis_summary, suggestion
+        # Reuse the stored slope when no trade has been recorded since it was computed
+        pnl_summary = crud.get_agent_pnl_summary_row(self.db, agent_id)
+        slope_is_current = (
+            pnl_summary is not None
+            and pnl_summary.pnl_slope is not None
+            and pnl_summary.pnl_slope_trade_id == pnl_summary.last_trade_id
+        )
+
+        trades = None
+        if not slope_is_current:
+            trades = self._get_trade_array(agent_id, limit=500) # Get recent trades with PnL
+            if trades is None:
+                analysis_summary += "No recent trade data with PnL found for analysis."
+                log.warning(analysis_summary)
+                return analysis_summary, suggestion
 
         # --- Basic PnL Trend Analysis (Example) ---
         try:
-            # Calculate cumulative PnL
-            df['cumulative_pnl'] = df['pnl_usd'].cumsum()
-            # Create a time feature (e.g., seconds since first trade)
-            df['time_elapsed'] = (df.index - df.index.min()).total_seconds()
-
-            # Simple Linear Regression on cumulative PnL vs time
-            X = df[['time_elapsed']] # Feature: time
-            y = df['cumulative_pnl'] # Target: cumulative PnL
-
-            if len(X) < 2: # Need at least 2 points for regression
-                 analysis_summary += "Insufficient data points for trend analysis."
+            slope = None
+            if slope_is_current:
+                slope = pnl_summary.pnl_slope
             else:
-                model = LinearRegression()
-                model.fit(X, y)
-                slope = model.coef_[0] # PnL change per second
-                intercept = model.intercept_
+                # Simple Linear Regression on cumulative PnL vs time
+                ts_ns = trades['ts'].view('i8')
+                x = ts_ns - ts_ns[0] # Feature: int64 nanoseconds since first trade (exact, no float pass)
+                y = np.cumsum(trades['pnl']) # Target: cumulative PnL
 
+                if len(x) < 2: # Need at least 2 points for regression
+                    analysis_summary += "Insufficient data points for trend analysis."
+                else:
+                    # Univariate OLS in closed form: slope = cov(x, y) / var(x). x is affine in seconds,
+                    # so the per-nanosecond slope only needs one scalar rescale to PnL change per second.
+                    dx = x - x.mean()
+                    var_x = (dx * dx).sum()
+                    slope = float((dx * (y - y.mean())).sum() / var_x) * 1e9 if var_x > 0 else 0.0
+                    if pnl_summary is not None:
+                        crud.update_agent_pnl_slope(self.db, agent_id, slope, pnl_summary.last_trade_id)
+
+            if slope is not None:
                 analysis_summary += f"Cumulative PnL trend (slope: {slope:.6f} USD/sec). "
 
                 # --- Generate Suggestion (Example based on trend) ---
@@ -109,46 +122,49 @@ class PerformanceAnalyzer:
         analysis_summary = f"Analysis for group {group_id}: "
         insight = None
 
-        agents_in_group = crud.get_agents_in_group(self.db, group_id)
-        if not agents_in_group:
+        group = crud.get_group_with_agents(self.db, group_id)
+        if not group or not group.agents:
             analysis_summary += "No agents found in this group."
             log.warning(analysis_summary)
             return analysis_summary, insight
 
-        all_trades_df_list = []
-        agent_ids = [agent.id for agent in agents_in_group]
-
-        for agent_id in agent_ids:
-            df = self._get_trade_dataframe(agent_id, limit=500)
-            if df is not None:
-                df['agent_id'] = agent_id # Add agent_id for grouping
-                all_trades_df_list.append(df)
+        agent_ids = [agent.id for agent in group.agents]
 
-        if not all_trades_df_list:
+        # One bulk query for the whole group (latest 500 trades per agent) instead of one per agent
+        rows = crud.get_trades_for_agents(self.db, agent_ids, limit_per_agent=500)
+        if not rows:
             analysis_summary += "No trade data found for any agent in the group."
             log.warning(analysis_summary)
             return analysis_summary, insight
 
-        # Combine data from all agents
-        group_df = pd.concat(all_trades_df_list)
-        group_df = group_df.sort_index()
+        # One contiguous TRADE_DTYPE buffer for the whole group, in time order
+        group_arr = np.fromiter(
+            ((_to_naive_utc(ts), pnl, a_id) for a_id, ts, pnl in rows),
+            dtype=TRADE_DTYPE, count=len(rows),
+        )
+        group_arr.sort(order='ts')
 
         # --- Group Analysis Examples (Placeholders) ---
         try:
             # Calculate overall group PnL
-            total_group_pnl = group_df['pnl_usd'].sum()
+            total_group_pnl = float(group_arr['pnl'].sum())
             analysis_summary += f"Total realized PnL: {total_group_pnl:.2f} USD. "
 
             # Compare agent performance within the group
-            pnl_by_agent = group_df.groupby('agent_id')['pnl_usd'].sum()
-            analysis_summary += f"PnL by agent: {pnl_by_agent.to_dict()}. "
-            best_agent = pnl_by_agent.idxmax()
-            worst_agent = pnl_by_agent.idxmin()
+            # Sort by agent once, then sum each contiguous run of agent ids
+            order = np.argsort(group_arr['agent_id'], kind='stable')
+            agent_ids_sorted = group_arr['agent_id'][order]
+            uniq_agents, starts = np.unique(agent_ids_sorted, return_index=True)
+            agent_sums = np.add.reduceat(group_arr['pnl'][order], starts)
+            pnl_by_agent = {int(a): float(p) for a, p in zip(uniq_agents, agent_sums)}
+            analysis_summary += f"PnL by agent: {pnl_by_agent}. "
+            best_agent = int(uniq_agents[np.argmax(agent_sums)])
+            worst_agent = int(uniq_agents[np.argmin(agent_sums)])
             analysis_summary += f"Best performer: Agent {best_agent}, Worst performer: Agent {worst_agent}. "
 
             # --- Generate Group Insight (Placeholder) ---
             insight_text = f"Group {group_id} analysis: Total PnL {total_group_pnl:.2f}. Agent {best_agent} performing best."
-            insight = {"group_id": group_id, "insight": insight_text, "details": {"total_pnl": total_group_pnl, "pnl_by_agent": pnl_by_agent.to_dict()}}
+            insight = {"group_id": group_id, "insight": insight_text, "details": {"total_pnl": total_group_pnl, "pnl_by_agent": pnl_by_agent}}
 
         except Exception as e:
             log.exception(f"Error during group analysis for group {group_id}: {e}")
@@ -160,8 +176,8 @@ class PerformanceAnalyzer:
              log.info(f"Insight generated for group {group_id}: {insight['insight']}")
              # --- Publish Insight (Testing Phase) ---
              if self.comm_bus and self.comm_bus.is_ready():
-                 self.comm_bus.publish(GROUP_UPDATES_CHANNEL, {"type": "insight", "payload": insight})
-                 log.info(f"Published insight for group {group_id} to {GROUP_UPDATES_CHANNEL}")
+                 if self.comm_bus.publish(GROUP_UPDATES_CHANNEL, {"type": "insight", "payload": insight}):
+                     log.info(f"Published insight for group {group_id} to {GROUP_UPDATES_CHANNEL}")
 
         return analysis_summary, insight
 
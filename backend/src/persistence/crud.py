@@ -1,9 +1,18 @@
 import logging
-from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Sequence, Tuple
+from sqlalchemy import select, case, delete, func, literal
+from sqlalchemy.orm import Session, load_only, selectinload
 from sqlalchemy.exc import IntegrityError
-from datetime import datetime # Import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, timedelta, timezone # Import datetime
+import csv
+import io
+import itertools
+import math
+from decimal import Decimal
+import threading
+from cachetools import TTLCache
+import numpy as np # Vectorized PnL aggregation
 
 from . import models
 from .models import Agent, Trade, AgentGroup, AgentStatusEnum, StrategyTypeEnum
@@ -11,8 +20,8 @@ from .models import Agent, Trade, AgentGroup, AgentStatusEnum, StrategyTypeEnum
 # --- Agent CRUD ---
 
 def get_agent_by_id(db: Session, agent_id: int) -> Optional[models.Agent]:
-    """Retrieves an agent by its primary key ID."""
-    return db.query(models.Agent).filter(models.Agent.id == agent_id).first()
+    """Retrieves an agent by its primary key ID (served from the session identity map when already loaded)."""
+    return db.get(models.Agent, agent_id)
 
 def get_agents(db: Session, skip: int = 0, limit: int = 100) -> List[models.Agent]:
     """Retrieves a list of agents with pagination."""
@@ -22,8 +31,7 @@ def create_agent(db: Session, name: str, strategy_type: StrategyTypeEnum, config
     """Creates a new agent record in the database, optionally assigning to a group."""
     # Check if group exists if group_id is provided
     if group_id is not None:
-        db_group = get_agent_group_by_id(db, group_id)
-        if not db_group:
+        if not agent_group_exists(db, group_id):
             # Or raise a specific exception?
             raise ValueError(f"AgentGroup with id {group_id} not found.")
 
@@ -63,8 +71,7 @@ def update_agent(db: Session, agent_id: int, name: Optional[str] = None, config:
              updated = True
     elif group_id is not None:
         # Check if group exists
-        db_group = get_agent_group_by_id(db, group_id)
-        if not db_group:
+        if db_agent.group_id != group_id and not agent_group_exists(db, group_id):
             raise ValueError(f"AgentGroup with id {group_id} not found.")
         if db_agent.group_id != group_id:
              logging.info(f"Assigning agent {agent_id} to group {group_id}")
@@ -72,8 +79,7 @@ def update_agent(db: Session, agent_id: int, name: Optional[str] = None, config:
              updated = True
 
     if updated:
-        db.commit()
-        db.refresh(db_agent)
+        db.commit() # No refresh: commit expires the instance, so only callers that read it pay for a reload
         logging.info(f"Agent updated in DB: ID={agent_id}")
     return db_agent
 
@@ -84,17 +90,51 @@ def update_agent_status(db: Session, agent_id: int, status: AgentStatusEnum, mes
     if db_agent:
         db_agent.status = status
         db_agent.status_message = message # Update or clear message
-        db.commit()
-        db.refresh(db_agent)
+        db.commit() # No refresh: status updates are fire-and-forget on the strategy hot path
         logging.info(f"Agent status updated in DB: ID={agent_id}, Status={status.value}")
         return db_agent
     logging.warning(f"Attempted to update status for non-existent agent ID: {agent_id}")
     return None
 
+def update_agent_statuses_bulk(db: Session, updates: Dict[int, Tuple[AgentStatusEnum, Optional[str]]]) -> int:
+    """
+    Applies many agent status updates in one UPDATE ... SET status = CASE id WHEN ... END statement.
+    updates maps agent_id -> (status, message). Returns the number of rows matched.
+    """
+    if not updates:
+        return 0
+    agents = models.Agent.__table__
+    status_by_id = {agent_id: literal(status, type_=agents.c.status.type) for agent_id, (status, _) in updates.items()}
+    message_by_id = {agent_id: literal(message, type_=agents.c.status_message.type) for agent_id, (_, message) in updates.items()}
+    result = db.execute(
+        agents.update()
+        .where(agents.c.id.in_(list(updates)))
+        .values(
+            status=case(status_by_id, value=agents.c.id),
+            status_message=case(message_by_id, value=agents.c.id),
+        )
+    )
+    db.commit()
+    logging.info(f"Agent statuses updated in DB: {', '.join(f'{a}={s.value}' for a, (s, _) in updates.items())}")
+    return result.rowcount
+
+def agent_status_summary(db: Session) -> Dict[str, int]:
+    """Counts agents per status in one GROUP BY over ix_agents_status; every status is present (0 if none)."""
+    summary = {status.value: 0 for status in AgentStatusEnum}
+    rows = db.execute(
+        select(models.Agent.status, func.count()).group_by(models.Agent.status)
+    )
+    for status, count in rows:
+        summary[status.value] = count
+    return summary
+
 def delete_agent(db: Session, agent_id: int) -> bool:
     """Deletes an agent record from the database."""
     db_agent = get_agent_by_id(db, agent_id)
     if db_agent:
+        # Explicit child deletes: databases created before ON DELETE CASCADE lack it, and passive_deletes won't load them
+        db.execute(delete(models.Trade).where(models.Trade.agent_id == agent_id))
+        db.execute(delete(models.AgentPnLSummary).where(models.AgentPnLSummary.agent_id == agent_id))
         db.delete(db_agent)
         db.commit()
         logging.info(f"Agent deleted from DB: ID={agent_id}")
@@ -110,8 +150,19 @@ def get_agents_in_group(db: Session, group_id: int) -> List[models.Agent]:
 # --- Agent Group CRUD ---
 
 def get_agent_group_by_id(db: Session, group_id: int) -> Optional[models.AgentGroup]:
-    """Retrieves an agent group by its primary key ID."""
-    return db.query(models.AgentGroup).filter(models.AgentGroup.id == group_id).first()
+    """Retrieves an agent group by its primary key ID (served from the session identity map when already loaded)."""
+    return db.get(models.AgentGroup, group_id)
+
+def agent_group_exists(db: Session, group_id: int) -> bool:
+    """Checks whether an agent group exists (SELECT EXISTS, no row hydration)."""
+    return db.query(db.query(models.AgentGroup).filter(models.AgentGroup.id == group_id).exists()).scalar()
+
+def get_group_with_agents(db: Session, group_id: int) -> Optional[models.AgentGroup]:
+    """Retrieves an agent group with its agents eagerly loaded (one extra SELECT ... IN, no lazy loads)."""
+    return db.query(models.AgentGroup)\
+             .options(selectinload(models.AgentGroup.agents))\
+             .filter(models.AgentGroup.id == group_id)\
+             .first()
 
 def get_agent_group_by_name(db: Session, name: str) -> Optional[models.AgentGroup]:
     """Retrieves an agent group by its unique name."""
@@ -162,8 +213,7 @@ def update_agent_group(db: Session, group_id: int, name: Optional[str] = None, d
 
     if updated:
         try:
-            db.commit()
-            db.refresh(db_group)
+            db.commit() # No refresh: expired attributes reload lazily if the caller reads them
             logging.info(f"AgentGroup updated in DB: ID={group_id}")
         except IntegrityError: # Catch unique constraint violation for name on update
             db.rollback()
@@ -177,14 +227,15 @@ def update_agent_group(db: Session, group_id: int, name: Optional[str] = None, d
 
 def delete_agent_group(db: Session, group_id: int) -> bool:
     """Deletes an agent group. Fails if group contains agents."""
-    # Use joinedload to efficiently check for agents
-    db_group = db.query(models.AgentGroup).options(joinedload(models.AgentGroup.agents)).filter(models.AgentGroup.id == group_id).first()
+    db_group = get_agent_group_by_id(db, group_id)
 
     if not db_group:
         logging.warning(f"Attempted to delete non-existent AgentGroup ID: {group_id}")
         return False
 
-    if db_group.agents:
+    # EXISTS probe on agents.group_id instead of loading every agent row
+    has_agents = db.query(db.query(models.Agent).filter(models.Agent.group_id == group_id).exists()).scalar()
+    if has_agents:
         logging.warning(f"Cannot delete AgentGroup {group_id} ('{db_group.name}') because it contains agents.")
         raise ValueError(f"Cannot delete group '{db_group.name}' as it is not empty.")
 
@@ -201,74 +252,118 @@ def delete_agent_group(db: Session, group_id: int) -> bool:
 
 # --- Group Performance ---
 
+# Group summaries keyed by (group_id, agent count, max trade id): a new trade or membership change
+# produces a new key, so stale entries are simply never hit again and age out.
+_group_perf_cache: TTLCache = TTLCache(maxsize=256, ttl=30)
+_group_perf_cache_lock = threading.Lock()
+
 def get_group_performance_summary(db: Session, group_id: int) -> Dict[str, Any]:
-    """Calculates aggregated performance summary for all agents in a group."""
-    agents_in_group = get_agents_in_group(db, group_id)
-    if not agents_in_group:
+    """
+    Calculates aggregated performance summary for all agents in a group.
+    Aggregation happens in the database: one COUNT for the agents and one GROUP BY over trades.
+    Results are cached per (group, agent count, newest trade id), so repeat calls with no new
+    trades cost a single indexed probe.
+    """
+    total_agents, latest_trade_id = db.execute(
+        select(func.count(func.distinct(models.Agent.id)), func.max(models.Trade.id))
+        .select_from(models.Agent)
+        .outerjoin(models.Trade, models.Trade.agent_id == models.Agent.id)
+        .where(models.Agent.group_id == group_id)
+    ).one()
+    if not total_agents:
         return {"message": "No agents found in this group.", "total_agents": 0}
 
-    total_realized_pnl = 0.0
-    total_trades_all_agents = 0
-    # More complex metrics would require iterating through individual agent trades or pre-aggregated data
-    # For MVP, we use the placeholder agent summary calculation
-
-    agent_pnl_summaries = []
-    for agent in agents_in_group:
-        summary = calculate_agent_pnl_summary(db, agent.id) # Uses placeholder calc
-        agent_pnl_summaries.append(summary)
-        total_realized_pnl += summary.get("realized_pnl_total_usd", 0.0)
-        # Need a way to get total trades per agent if not in summary
-        # trades = get_trades_for_agent(db, agent.id, limit=100000) # Potentially very slow
-        # total_trades_all_agents += len(trades)
-
-    # Placeholder for aggregated metrics
+    cache_key = (group_id, total_agents, latest_trade_id)
+    with _group_perf_cache_lock:
+        cached = _group_perf_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+
+    per_agent = db.execute(
+        select(models.Trade.agent_id, func.coalesce(func.sum(models.Trade.pnl_usd), 0.0), func.count(models.Trade.id))
+        .join(models.Agent, models.Agent.id == models.Trade.agent_id)
+        .where(models.Agent.group_id == group_id)
+        .group_by(models.Trade.agent_id)
+    ).all()
+
+    total_realized_pnl = sum(float(pnl) for _, pnl, _ in per_agent)
+    total_trades_all_agents = sum(count for _, _, count in per_agent)
+
     # TODO: Implement more sophisticated aggregation (avg win rate, Sharpe, etc.)
-    return {
+    summary = {
         "group_id": group_id,
-        "total_agents": len(agents_in_group),
+        "total_agents": total_agents,
         "aggregated_realized_pnl_usd": round(total_realized_pnl, 2),
-        # "total_trades": total_trades_all_agents, # Example
+        "total_trades": total_trades_all_agents,
         "message": "Note: PnL calculations are based on placeholder logic."
     }
+    with _group_perf_cache_lock:
+        _group_perf_cache[cache_key] = summary
+    return dict(summary)
 
 
 # --- Trade CRUD ---
 
-def create_trade(db: Session, agent_id: int, trade_data: Dict[str, Any], pnl_usd: Optional[float] = None) -> models.Trade:
-    """
-    Creates a new trade record associated with an agent.
-    Accepts an optional pre-calculated PnL for the trade.
-    """
+_TRADE_REQUIRED_FIELDS = ("symbol", "orderId", "side", "price", "executedQty", "cummulativeQuoteQty")
+
+def _to_decimal(value: Any) -> Decimal:
+    """Converts a Binance decimal string (or number) to Decimal without binary-float rounding."""
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+def _trade_row(agent_id: int, trade_data: Dict[str, Any], pnl_usd: Optional[float], default_timestamp: Any) -> Dict[str, Any]:
+    """Validates a Binance order/trade dict and maps it to Trade column values."""
     # Basic validation for essential trade data
-    required_fields = ["symbol", "orderId", "side", "price", "executedQty", "cummulativeQuoteQty"]
-    if not all(field in trade_data for field in required_fields):
+    if not all(field in trade_data for field in _TRADE_REQUIRED_FIELDS):
         logging.error(f"Missing required fields in trade_data for agent {agent_id}: {trade_data}")
         raise ValueError("Missing required fields in trade_data")
+    return {
+        "agent_id": agent_id,
+        "symbol": trade_data.get("symbol"),
+        # Binance sends orderId as an int; store it as the String column's value so dedupe keys compare equal
+        "order_id": str(trade_data["orderId"]) if trade_data.get("orderId") is not None else None,
+        "client_order_id": trade_data.get("clientOrderId"),
+        "side": trade_data.get("side"),
+        # Binance sends decimal strings; Decimal keeps them exact on the way into the Numeric columns
+        "price": _to_decimal(trade_data.get("price", 0)),
+        "quantity": _to_decimal(trade_data.get("executedQty", 0)),
+        "quote_quantity": _to_decimal(trade_data.get("cummulativeQuoteQty", 0)),
+        "commission": _to_decimal(trade_data.get("commission", 0) or 0),
+        "commission_asset": trade_data.get("commissionAsset"),
+        # Use timestamp from trade data if available, otherwise the caller's default
+        # Binance trade timestamp is typically in milliseconds
+        "timestamp": datetime.fromtimestamp(trade_data['time'] / 1000, tz=timezone.utc) if 'time' in trade_data else default_timestamp,
+        "pnl_usd": _to_decimal(pnl_usd) if pnl_usd is not None else None, # Pre-calculated PnL, if any
+    }
 
+def _trade_insert(db: Session):
+    """INSERT INTO trades ... ON CONFLICT (agent_id, order_id) DO NOTHING, for the session's dialect."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        insert = postgresql.insert
+    elif dialect == "sqlite":
+        insert = sqlite.insert
+    else:
+        return models.Trade.__table__.insert() # Duplicates surface as IntegrityError
+    return insert(models.Trade.__table__).on_conflict_do_nothing(index_elements=["agent_id", "order_id"])
+
+def create_trade(db: Session, agent_id: int, trade_data: Dict[str, Any], pnl_usd: Optional[float] = None) -> Optional[int]:
+    """
+    Creates a new trade record associated with an agent.
+    Accepts an optional pre-calculated PnL for the trade.
+    Idempotent per (agent_id, orderId): returns the new trade's id, or None if the order was already recorded.
+    """
     # Wrap the creation in a try block to handle potential DB errors
     try:
-        db_trade = models.Trade(
-        agent_id=agent_id,
-        symbol=trade_data.get("symbol"),
-        order_id=trade_data.get("orderId"), # Match Binance naming
-        client_order_id=trade_data.get("clientOrderId"),
-        side=trade_data.get("side"),
-        price=float(trade_data.get("price", 0.0)),
-        quantity=float(trade_data.get("executedQty", 0.0)),
-        quote_quantity=float(trade_data.get("cummulativeQuoteQty", 0.0)),
-        commission=float(trade_data.get("commission", 0.0) or 0.0),
-        commission_asset=trade_data.get("commissionAsset"),
-        # Use timestamp from trade data if available and valid, otherwise use current time
-        # Binance trade timestamp is typically in milliseconds
-        timestamp=datetime.fromtimestamp(trade_data['time'] / 1000) if 'time' in trade_data else func.now(),
-        pnl_usd=pnl_usd # Assign the calculated PnL
-    )
-        # Removed extra closing parenthesis here
-        db.add(db_trade)
+        row = _trade_row(agent_id, trade_data, pnl_usd, default_timestamp=func.now())
+        trade_id = db.execute(_trade_insert(db).values(**row).returning(models.Trade.id)).scalar()
+        if trade_id is None:
+            db.rollback()
+            logging.debug(f"Trade already recorded for Agent ID {agent_id}: OrderID={trade_data.get('orderId')}")
+            return None
+        _apply_trades_to_pnl_summary(db, agent_id, 1, _to_decimal(pnl_usd or 0))
         db.commit()
-        db.refresh(db_trade)
-        logging.debug(f"Trade recorded in DB for Agent ID {agent_id}: OrderID={db_trade.order_id}")
-        return db_trade
+        logging.debug(f"Trade recorded in DB for Agent ID {agent_id}: OrderID={trade_data.get('orderId')}")
+        return trade_id
     except IntegrityError as e:
         db.rollback()
         logging.error(f"Database integrity error creating trade for agent {agent_id}: {e}")
@@ -279,6 +374,165 @@ def create_trade(db: Session, agent_id: int, trade_data: Dict[str, Any], pnl_usd
         logging.exception(f"Unexpected database error creating trade for agent {agent_id}: {e}")
         raise # Re-raise unexpected errors
 
+def _apply_trades_to_pnl_summary(db: Session, agent_id: int, trade_count: int, pnl_delta: Decimal) -> None:
+    """
+    Adds newly inserted (flushed, uncommitted) trades to the agent's AgentPnLSummary row in the caller's
+    transaction. A missing row (new agent, or a database that predates the table) is backfilled
+    from the trades table, which already includes the new trades.
+    """
+    summary = models.AgentPnLSummary.__table__
+    trades = models.Trade.__table__
+    agent_trades = trades.c.agent_id == agent_id
+    result = db.execute(
+        summary.update()
+        .where(summary.c.agent_id == agent_id)
+        .values(
+            realized_pnl_usd=summary.c.realized_pnl_usd + pnl_delta,
+            trade_count=summary.c.trade_count + trade_count,
+            # Both resolve through ix_trades_agent_ts / the primary key
+            last_trade_id=select(func.max(trades.c.id)).where(agent_trades).scalar_subquery(),
+            last_trade_ts=select(func.max(trades.c.timestamp)).where(agent_trades).scalar_subquery(),
+        )
+    )
+    if result.rowcount == 0:
+        db.execute(summary.insert().from_select(
+            ["agent_id", "realized_pnl_usd", "trade_count", "last_trade_id", "last_trade_ts"],
+            select(
+                literal(agent_id),
+                func.coalesce(func.sum(trades.c.pnl_usd), 0.0),
+                func.count(trades.c.id),
+                func.max(trades.c.id),
+                func.max(trades.c.timestamp),
+            ).where(agent_trades),
+        ))
+
+def get_agent_pnl_summary_row(db: Session, agent_id: int) -> Optional[models.AgentPnLSummary]:
+    """Retrieves the agent's running PnL totals (None if the agent has never recorded a trade)."""
+    return db.get(models.AgentPnLSummary, agent_id)
+
+def update_agent_pnl_slope(db: Session, agent_id: int, slope: float, trade_id: Optional[int]) -> None:
+    """Caches the analyzer's PnL trend slope, valid until a trade newer than trade_id is recorded."""
+    summary = models.AgentPnLSummary.__table__
+    db.execute(
+        summary.update()
+        .where(summary.c.agent_id == agent_id)
+        .values(pnl_slope=slope, pnl_slope_trade_id=trade_id)
+    )
+    db.commit()
+
+def create_trades_bulk(db: Session, agent_id: int, trade_dicts: Sequence[Dict[str, Any]]) -> int:
+    """
+    Inserts many trades for an agent in one executemany and a single commit (no per-row refresh).
+    Each dict uses the Binance field names accepted by create_trade, plus an optional 'pnl_usd'.
+    Orders already recorded for the agent (or repeated within the batch) are skipped.
+    Returns the number of rows inserted.
+    """
+    if not trade_dicts:
+        return 0
+    now = datetime.now(timezone.utc) # executemany needs literal values, so no func.now() default
+    rows_by_order: Dict[Any, Dict[str, Any]] = {}
+    for trade_data in trade_dicts:
+        row = _trade_row(agent_id, trade_data, trade_data.get("pnl_usd"), default_timestamp=now)
+        rows_by_order.setdefault(row["order_id"], row)
+
+    try:
+        # One probe on uq_trades_agent_order drops replays up front, so the summary only counts new rows
+        existing = db.scalars(
+            select(models.Trade.order_id)
+            .where(models.Trade.agent_id == agent_id, models.Trade.order_id.in_(list(rows_by_order)))
+        ).all()
+        for order_id in existing:
+            del rows_by_order[order_id]
+        rows = list(rows_by_order.values())
+        if not rows:
+            db.rollback() # End the read-only transaction
+            return 0
+        db.execute(_trade_insert(db), rows)
+        pnl_delta = sum((row["pnl_usd"] for row in rows if row["pnl_usd"] is not None), Decimal(0))
+        _apply_trades_to_pnl_summary(db, agent_id, len(rows), pnl_delta)
+        db.commit()
+        logging.debug(f"Bulk-recorded {len(rows)} trades in DB for Agent ID {agent_id}")
+        return len(rows)
+    except IntegrityError as e:
+        db.rollback()
+        logging.error(f"Database integrity error bulk-creating trades for agent {agent_id}: {e}")
+        raise ValueError(f"Integrity error creating trades: {e}")
+    except Exception as e:
+        db.rollback()
+        logging.exception(f"Unexpected database error bulk-creating trades for agent {agent_id}: {e}")
+        raise
+
+# Column order for COPY; matches the keys produced by _trade_row
+_TRADE_COPY_COLUMNS = (
+    "agent_id", "timestamp", "symbol", "order_id", "client_order_id", "side", "price", "quantity",
+    "quote_quantity", "commission", "commission_asset", "pnl_usd",
+)
+
+def bulk_backfill_trades(db: Session, agent_id: int, trade_dicts: Iterable[Dict[str, Any]], chunk_rows: int = 10000) -> int:
+    """
+    Imports historical trades for an agent (Binance dicts, as for create_trades_bulk) in one transaction.
+    On PostgreSQL rows are streamed through COPY ... FROM STDIN as CSV, chunk_rows at a time through a
+    reused buffer, so memory stays bounded for any input size; other dialects fall back to chunked executemany.
+    Like create_trades_bulk, orders already recorded for the agent are skipped, so a backfill can be re-run.
+    Returns the number of rows inserted.
+    """
+    now = datetime.now(timezone.utc)
+    rows = (_trade_row(agent_id, trade_data, trade_data.get("pnl_usd"), default_timestamp=now) for trade_data in trade_dicts)
+    use_copy = db.get_bind().dialect.name == "postgresql"
+    total = 0
+    pnl_delta = Decimal(0)
+
+    try:
+        if use_copy:
+            # Raw DBAPI (psycopg2) cursor on the session's connection, so COPY joins the session transaction
+            cursor = db.connection().connection.cursor()
+            # COPY has no ON CONFLICT: stage each chunk in a temp table, then INSERT ... SELECT the new orders
+            columns = ", ".join(_TRADE_COPY_COLUMNS)
+            cursor.execute(f"CREATE TEMP TABLE trades_backfill ON COMMIT DROP AS SELECT {columns} FROM trades WITH NO DATA")
+            copy_sql = f"COPY trades_backfill ({columns}) FROM STDIN WITH (FORMAT csv)"
+            merge_sql = (
+                f"WITH inserted AS (INSERT INTO trades ({columns}) SELECT {columns} FROM trades_backfill"
+                f" ON CONFLICT (agent_id, order_id) DO NOTHING RETURNING pnl_usd)"
+                f" SELECT count(*), coalesce(sum(pnl_usd), 0) FROM inserted"
+            )
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_rows))
+            if not chunk:
+                break
+            if use_copy:
+                buf.seek(0)
+                buf.truncate()
+                # csv writes None as an unquoted empty field, which COPY reads as NULL
+                writer.writerows([row[col] for col in _TRADE_COPY_COLUMNS] for row in chunk)
+                buf.seek(0)
+                cursor.execute("TRUNCATE trades_backfill")
+                cursor.copy_expert(copy_sql, buf)
+                cursor.execute(merge_sql)
+                inserted, chunk_pnl = cursor.fetchone()
+            else:
+                # RETURNING yields only the rows ON CONFLICT let through
+                inserted_pnl = db.scalars(_trade_insert(db).returning(models.Trade.pnl_usd), chunk).all()
+                inserted = len(inserted_pnl)
+                chunk_pnl = sum((_to_decimal(pnl) for pnl in inserted_pnl if pnl is not None), Decimal(0))
+            total += inserted
+            pnl_delta += _to_decimal(chunk_pnl)
+
+        if total:
+            _apply_trades_to_pnl_summary(db, agent_id, total, pnl_delta)
+        db.commit()
+        logging.info(f"Backfilled {total} trades for Agent ID {agent_id} ({'COPY' if use_copy else 'executemany'})")
+        return total
+    except IntegrityError as e:
+        db.rollback()
+        logging.error(f"Database integrity error backfilling trades for agent {agent_id}: {e}")
+        raise ValueError(f"Integrity error backfilling trades: {e}")
+    except Exception as e:
+        db.rollback()
+        logging.exception(f"Unexpected database error backfilling trades for agent {agent_id}: {e}")
+        raise
+
 def get_trades_for_agent(db: Session, agent_id: int, skip: int = 0, limit: int = 1000) -> List[models.Trade]:
     """Retrieves trades for a specific agent, ordered by timestamp descending."""
     # TODO: Add time_period filtering based on timestamp column
@@ -289,27 +543,102 @@ def get_trades_for_agent(db: Session, agent_id: int, skip: int = 0, limit: int =
              .limit(limit)\
              .all()
 
-# --- Performance Calculation Helpers (Placeholders) ---
+def get_trades_for_agents(db: Session, agent_ids: List[int], limit_per_agent: int = 500) -> List[Any]:
+    """
+    Fetches the most recent `limit_per_agent` trades for each of `agent_ids` in ONE query.
+    Uses ROW_NUMBER() OVER (PARTITION BY agent_id ORDER BY timestamp DESC), supported by
+    PostgreSQL and SQLite >= 3.25. Only trades with a PnL are returned, as
+    (agent_id, timestamp, pnl_usd) rows in no particular order.
+    """
+    if not agent_ids:
+        return []
+    ranked = select(
+            models.Trade.agent_id,
+            models.Trade.timestamp,
+            models.Trade.pnl_usd,
+            func.row_number().over(
+                partition_by=models.Trade.agent_id,
+                order_by=models.Trade.timestamp.desc(),
+            ).label("rn"),
+        )\
+        .where(models.Trade.agent_id.in_(agent_ids))\
+        .subquery()
+    stmt = select(ranked.c.agent_id, ranked.c.timestamp, ranked.c.pnl_usd)\
+        .where(ranked.c.rn <= limit_per_agent)\
+        .where(ranked.c.pnl_usd.isnot(None))
+    return db.execute(stmt).all()
+
+def iter_trades_for_agent(db: Session, agent_id: int, limit: int = 1000, batch_size: int = 500) -> Iterator[models.Trade]:
+    """
+    Streams an agent's trades (timestamp descending) in batches of `batch_size` instead of
+    materializing the full list. Only the display/KPI columns are loaded.
+    """
+    stmt = select(models.Trade)\
+        .options(load_only(
+            models.Trade.timestamp, models.Trade.symbol, models.Trade.side, models.Trade.price,
+            models.Trade.quantity, models.Trade.order_id, models.Trade.pnl_usd,
+        ))\
+        .where(models.Trade.agent_id == agent_id)\
+        .order_by(models.Trade.timestamp.desc())\
+        .limit(limit)\
+        .execution_options(yield_per=batch_size)
+    return iter(db.scalars(stmt))
 
-from sqlalchemy import func, select, Numeric # Import func and select
-from sqlalchemy.types import Float # Import Float for casting if needed
+# --- Performance Calculation Helpers (Placeholders) ---
 
 def calculate_agent_pnl_summary(db: Session, agent_id: int) -> Dict[str, Any]:
-    """Calculates the total realized PnL summary for an agent by summing trade PnLs."""
-    # Query the sum of pnl_usd for the given agent_id
-    # Ensure pnl_usd is treated as numeric/float for summation
-    # Use coalesce to handle cases where there are no trades or pnl_usd is NULL, returning 0.0
-    total_pnl_query = select(func.coalesce(func.sum(models.Trade.pnl_usd), 0.0))\
-        .where(models.Trade.agent_id == agent_id)\
-        .where(models.Trade.pnl_usd.isnot(None)) # Only sum non-null PnL values
+    """
+    Calculates the realized PnL summary for an agent in a single aggregate query:
+    total realized PnL, trade count and realized PnL over the last 24h. No trade rows are loaded.
+    """
+    since_24h = datetime.now(timezone.utc) - timedelta(hours=24) # Stored timestamps are UTC
+    # SUM ignores NULL pnl_usd; coalesce covers agents without trades
+    summary_query = select(
+            func.coalesce(func.sum(models.Trade.pnl_usd), 0.0),
+            func.count(models.Trade.id),
+            func.coalesce(func.sum(case((models.Trade.timestamp > since_24h, models.Trade.pnl_usd), else_=0.0)), 0.0),
+        )\
+        .where(models.Trade.agent_id == agent_id)
 
-    total_realized_pnl = db.execute(total_pnl_query).scalar_one()
+    total_realized_pnl, trade_count, pnl_24h = db.execute(summary_query).one()
 
     # TODO: Implement Unrealized PnL calculation (requires tracking current open positions and market price)
-    # TODO: Implement PnL for specific time periods (e.g., 24h) by filtering trades based on timestamp
 
     return {
         "realized_pnl_total_usd": round(float(total_realized_pnl), 2), # Ensure result is float
         "unrealized_pnl_usd": 0.0, # Placeholder - Requires position tracking
-        "pnl_24h_usd": 0.0 # Placeholder - Requires time filtering
+        "pnl_24h_usd": round(float(pnl_24h), 2),
+        "trade_count": int(trade_count),
     }
+
+def get_trade_pnl_rows(db: Session, agent_id: int, limit: int = 1000) -> List[tuple]:
+    """
+    Returns the agent's most recent trades with PnL as plain (timestamp, pnl_usd) tuples, newest first.
+    Core select: no ORM instances or identity-map entries are created.
+    """
+    stmt = select(models.Trade.timestamp, models.Trade.pnl_usd)\
+        .where(models.Trade.agent_id == agent_id)\
+        .where(models.Trade.pnl_usd.isnot(None))\
+        .order_by(models.Trade.timestamp.desc())\
+        .limit(limit)\
+        .execution_options(yield_per=1000)
+    return [tuple(row) for row in db.execute(stmt)]
+
+def calculate_pnl_statistics(pnl: Sequence[float], total_trades: Optional[int] = None, periods_per_year: int = 365) -> Dict[str, float]:
+    """
+    Computes total PnL, win rate and an annualized Sharpe ratio from a per-trade PnL array.
+    total_trades is the win-rate denominator (defaults to len(pnl); pass the full trade count to
+    include trades without PnL). Sharpe is 0.0 when there are fewer than 2 points or no variance.
+    """
+    pnl = np.asarray(pnl, dtype=np.float64)
+    n = total_trades if total_trades is not None else pnl.size
+    if pnl.size == 0:
+        return {"total_pnl_usd": 0.0, "win_rate_pct": 0.0, "sharpe_ratio": 0.0}
+    total = float(pnl.sum())
+    win_rate = float(np.count_nonzero(pnl > 0)) / n * 100 if n > 0 else 0.0
+    sharpe = 0.0
+    if pnl.size > 1:
+        std = pnl.std(ddof=1)
+        if std > 0:
+            sharpe = float(pnl.mean() / std * math.sqrt(periods_per_year))
+    return {"total_pnl_usd": total, "win_rate_pct": win_rate, "sharpe_ratio": sharpe}
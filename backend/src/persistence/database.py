@@ -1,5 +1,6 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text, __version__ as SQLALCHEMY_VERSION
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker, Session
 from decouple import config # Using python-decouple for config
 import logging
@@ -19,7 +20,19 @@ if DB_TYPE == "postgres":
     # Construct the DATABASE_URL for PostgreSQL
     DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
     log.info(f"Using PostgreSQL database: {POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}")
-    engine_args = {} # No special args needed for psycopg2 usually
+    engine_args = {
+        # Agents run in their own threads, each holding a session; the default 5+10 pool stalls them
+        "pool_size": config("DB_POOL_SIZE", default=20, cast=int),
+        "max_overflow": config("DB_MAX_OVERFLOW", default=40, cast=int),
+        "pool_pre_ping": True, # Replace connections dropped by the server/proxy instead of failing on first use
+        "pool_recycle": 1800, # Seconds; stay below typical idle-connection timeouts
+        "pool_use_lifo": True, # Reuse the most recent connection so idle extras can time out
+        # psycopg2: rewrite executemany INSERTs (e.g. crud.create_trades_bulk) into multi-row VALUES pages
+        "executemany_mode": "values_plus_batch",
+        # The page-size argument was renamed in SQLAlchemy 2.0
+        ("insertmanyvalues_page_size" if int(SQLALCHEMY_VERSION.split(".")[0]) >= 2
+         else "executemany_values_page_size"): 1000,
+    }
     is_sqlite = False
 elif DB_TYPE == "sqlite":
     # Default to SQLite relative to the backend directory for simplicity
@@ -27,7 +40,11 @@ elif DB_TYPE == "sqlite":
     DATABASE_URL = config("DATABASE_URL", default="sqlite:///./backend/trading_agents.db")
     log.info(f"Using SQLite database: {DATABASE_URL}")
     # For SQLite, need connect_args to handle multi-threading if using threads for agents
+    # SQLAlchemy 1.4 uses NullPool for file databases (a new connection per session); pool them instead.
+    # Not StaticPool: a single shared connection would interleave the agent threads' transactions.
     engine_args = {"connect_args": {"check_same_thread": False}}
+    if ":memory:" not in DATABASE_URL:
+        engine_args.update({"poolclass": QueuePool, "pool_size": 10, "max_overflow": 20})
     is_sqlite = True
 else:
     raise ValueError(f"Unsupported DB_TYPE: {DB_TYPE}. Use 'postgres' or 'sqlite'.")
@@ -41,6 +58,25 @@ except ImportError as e:
          log.error("psycopg2 not installed. Please install it: pip install psycopg2-binary")
      raise e
 
+if is_sqlite:
+    # Per-connection SQLite settings. WAL lets readers run alongside the single writer;
+    # synchronous=NORMAL is durable under WAL and avoids an fsync on every commit.
+    _SQLITE_PRAGMAS = (
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+        "temp_store=MEMORY",
+        "mmap_size=268435456", # 256 MiB
+        "cache_size=-65536", # 64 MiB (negative = KiB)
+        "foreign_keys=ON",
+    )
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
 # --- Session Factory ---
 # autocommit=False and autoflush=False are standard practices for web applications
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -65,7 +101,7 @@ def init_db():
     Creates database tables based on the models.
     WARNING: Use Alembic for production schema management.
     """
-    from .models import Base # Import Base here to avoid circular imports
+    from .models import Base, POSTGRES_EXTRA_DDL # Import here to avoid circular imports
     log.info("Attempting to initialize database tables...")
     log.info(f"Database URL used: {DATABASE_URL}") # Log the actual URL being used
     # Add a check to prevent running on existing DB without care
@@ -74,6 +110,15 @@ def init_db():
     try:
         Base.metadata.create_all(bind=engine)
         log.info("Database tables created successfully (if they didn't exist).")
+        # create_all skips tables that already exist, so indexes added to the models later
+        # (e.g. ix_trades_agent_ts) would never reach existing databases. Create any missing ones.
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+        if engine.dialect.name == "postgresql":
+            with engine.begin() as conn:
+                for ddl in POSTGRES_EXTRA_DDL:
+                    conn.execute(text(ddl))
     except Exception as e:
         log.exception(f"Error creating database tables: {e}")
         # Don't raise here, allow application to potentially handle it
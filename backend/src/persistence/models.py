@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, Integer, String, Float, DateTime, JSON, Enum as SQLAlchemyEnum, ForeignKey, Text
+    Column, Integer, String, Float, Numeric, DateTime, JSON, Enum as SQLAlchemyEnum, ForeignKey, Text, Index
 )
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
@@ -8,6 +8,10 @@ import uuid # For potential UUID group IDs
 
 Base = declarative_base()
 
+# Exact fixed-point storage for prices, quantities and money. Values are written as Decimal and
+# read back as float (asdecimal=False) for the NumPy/JSON consumers; SUMs run exactly in the DB.
+Money = Numeric(20, 10, asdecimal=False)
+
 # --- Enums ---
 class AgentStatusEnum(enum.Enum):
     CREATED = "created"
@@ -22,6 +26,14 @@ class StrategyTypeEnum(enum.Enum):
     ARBITRAGE = "arbitrage"
     # Add other strategies here
 
+def _string_enum(enum_cls, name: str) -> SQLAlchemyEnum:
+    """
+    Enum column stored as VARCHAR, guarded by a CHECK constraint instead of a native Postgres ENUM type:
+    new members need no ALTER TYPE, and the column indexes like any string. It stores member names
+    ('RUNNING'), as the original Enum columns did, so existing rows keep loading.
+    """
+    return SQLAlchemyEnum(enum_cls, name=name, native_enum=False, create_constraint=True, length=16)
+
 # --- Tables ---
 
 class AgentGroup(Base):
@@ -46,10 +58,10 @@ class Agent(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
-    strategy_type = Column(SQLAlchemyEnum(StrategyTypeEnum), nullable=False)
+    strategy_type = Column(_string_enum(StrategyTypeEnum, "ck_agents_strategy_type"), nullable=False)
     # Store config as JSON.
     config = Column(JSON, nullable=False)
-    status = Column(SQLAlchemyEnum(AgentStatusEnum), default=AgentStatusEnum.CREATED, nullable=False)
+    status = Column(_string_enum(AgentStatusEnum, "ck_agents_status"), default=AgentStatusEnum.CREATED, nullable=False)
     status_message = Column(Text, nullable=True)
 
     # Foreign Key to AgentGroup (nullable)
@@ -60,7 +72,15 @@ class Agent(Base):
 
     # Relationships
     group = relationship("AgentGroup", back_populates="agents")
-    trades = relationship("Trade", back_populates="agent", cascade="all, delete-orphan")
+    # passive_deletes: deleting an agent leaves its trades/summary to the FK's ON DELETE CASCADE
+    # (one statement) instead of loading and deleting every child row through the ORM
+    trades = relationship("Trade", back_populates="agent", cascade="all, delete-orphan", passive_deletes=True)
+    pnl_summary = relationship("AgentPnLSummary", uselist=False, cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        # Status counts and "all RUNNING agents" lookups
+        Index("ix_agents_status", status),
+    )
 
     def __repr__(self):
         return f"<Agent(id={self.id}, name='{self.name}', group={self.group_id}, strategy='{self.strategy_type.value}', status='{self.status.value}')>"
@@ -70,25 +90,58 @@ class Trade(Base):
     __tablename__ = "trades"
 
     id = Column(Integer, primary_key=True, index=True)
-    agent_id = Column(Integer, ForeignKey("agents.id"), nullable=False, index=True)
-    timestamp = Column(DateTime(timezone=True), default=func.now(), nullable=False, index=True)
-    symbol = Column(String, index=True)
-    order_id = Column(String, unique=True, index=True) # Binance order ID
+    agent_id = Column(Integer, ForeignKey("agents.id", ondelete="CASCADE"), nullable=False) # Indexed via ix_trades_agent_ts (leading column)
+    timestamp = Column(DateTime(timezone=True), default=func.now(), nullable=False) # Indexed via the composites below
+    symbol = Column(String) # Indexed via ix_trades_symbol_ts
+    order_id = Column(String, index=True) # Binance order ID; unique per agent (see uq_trades_agent_order)
     client_order_id = Column(String, index=True) # Optional client order ID
     side = Column(String) # e.g., BUY, SELL
-    price = Column(Float)
-    quantity = Column(Float)
-    quote_quantity = Column(Float) # e.g., USDT value
-    commission = Column(Float, nullable=True)
+    price = Column(Money)
+    quantity = Column(Money)
+    quote_quantity = Column(Money) # e.g., USDT value
+    commission = Column(Money, nullable=True)
     commission_asset = Column(String, nullable=True)
-    pnl_usd = Column(Float, nullable=True) # Calculated PnL for this trade
+    pnl_usd = Column(Money, nullable=True) # Calculated PnL for this trade
     # Add other relevant fields from Binance execution reports
 
+    __table_args__ = (
+        # "Most recent trades for agent X": backward index scan returns the top N without a sort
+        Index("ix_trades_agent_ts", agent_id, timestamp.desc()),
+        # Cross-agent analytics for one symbol over a time range
+        Index("ix_trades_symbol_ts", symbol, timestamp),
+        # Idempotent writes: a replayed order is skipped via ON CONFLICT (agent_id, order_id) DO NOTHING.
+        # A unique index rather than a UniqueConstraint, so init_db also adds it to existing databases.
+        Index("uq_trades_agent_order", agent_id, order_id, unique=True),
+    )
+
     agent = relationship("Agent", back_populates="trades")
 
     def __repr__(self):
         return f"<Trade(id={self.id}, agent_id={self.agent_id}, symbol='{self.symbol}', side='{self.side}', price={self.price}, qty={self.quantity})>"
 
+class AgentPnLSummary(Base):
+    """Running per-agent PnL totals, maintained by crud on every trade insert."""
+    __tablename__ = "agent_pnl_summaries"
+
+    agent_id = Column(Integer, ForeignKey("agents.id", ondelete="CASCADE"), primary_key=True)
+    realized_pnl_usd = Column(Money, nullable=False, default=0.0)
+    trade_count = Column(Integer, nullable=False, default=0)
+    last_trade_id = Column(Integer, nullable=True)
+    last_trade_ts = Column(DateTime(timezone=True), nullable=True)
+    # Analyzer trend slope, valid while pnl_slope_trade_id == last_trade_id
+    pnl_slope = Column(Float, nullable=True)
+    pnl_slope_trade_id = Column(Integer, nullable=True)
+
+    def __repr__(self):
+        return f"<AgentPnLSummary(agent_id={self.agent_id}, realized={self.realized_pnl_usd}, trades={self.trade_count})>"
+
+# PostgreSQL-only DDL, applied idempotently by database.init_db.
+POSTGRES_EXTRA_DDL = (
+    # trades is append-only and time-ordered, so a BRIN index serves time-range scans at a tiny
+    # fraction of a B-tree's size and insert cost. (Monthly partitioning would need timestamp in the PK.)
+    "CREATE INDEX IF NOT EXISTS ix_trades_ts_brin ON trades USING BRIN (timestamp) WITH (pages_per_range = 32)",
+)
+
 # Consider adding models for:
 # - Positions (if strategies hold positions)
 # - PerformanceSnapshots (periodically calculated KPIs)
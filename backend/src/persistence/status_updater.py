@@ -0,0 +1,87 @@
+import atexit
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+from decouple import config
+
+from . import crud, database
+from .models import AgentStatusEnum
+
+log = logging.getLogger(__name__)
+
+STATUS_UPDATER_FLUSH_INTERVAL_MS = config("STATUS_UPDATER_FLUSH_INTERVAL_MS", default=500, cast=int)
+
+class StatusUpdater:
+    """
+    Debounces agent status writes. set() only records the latest (status, message) per agent;
+    a daemon thread writes all pending statuses in one bulk UPDATE every flush interval, so an agent
+    flapping between states produces one write per interval carrying its last observed state.
+    """
+
+    def __init__(self, flush_interval_ms: int = STATUS_UPDATER_FLUSH_INTERVAL_MS):
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._pending: Dict[int, Tuple[AgentStatusEnum, Optional[str]]] = {}
+        self._lock = threading.Lock() # Guards _pending
+        self._write_lock = threading.Lock() # Keeps flushes ordered (background vs. forced)
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name="StatusUpdater", daemon=True)
+                self._thread.start()
+
+    def set(self, agent_id: int, status: AgentStatusEnum, message: Optional[str] = None, flush: bool = False):
+        """Records the agent's latest status; flush=True writes it (and anything pending) before returning."""
+        with self._lock:
+            self._pending[agent_id] = (status, message)
+        if flush:
+            self.flush()
+        else:
+            self._ensure_started()
+            self._wakeup.set()
+
+    def flush(self):
+        """Writes all pending statuses now, in the calling thread."""
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            try:
+                with database.SessionLocal() as db:
+                    crud.update_agent_statuses_bulk(db, batch)
+            except Exception as e:
+                log.exception("CRITICAL: Failed to write %d agent status updates: %s", len(batch), e)
+                # Put them back unless a newer status arrived meanwhile
+                with self._lock:
+                    for agent_id, update in batch.items():
+                        self._pending.setdefault(agent_id, update)
+                self._wakeup.set() # Retry on the next interval
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Let further updates within the interval coalesce into the same write
+            if self._stop_event.wait(self.flush_interval):
+                break
+            self.flush()
+        self.flush()
+
+    def close(self):
+        """Writes any pending statuses and stops the flush thread."""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self.flush()
+
+# Shared updater used by all strategies in this process
+status_updater = StatusUpdater()
+atexit.register(status_updater.close)
@@ -0,0 +1,107 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+from decouple import config
+
+from . import crud, database
+
+log = logging.getLogger(__name__)
+
+# Flush when this many trades are queued, or when the oldest queued trade has waited this long
+TRADE_WRITER_MAX_BATCH_SIZE = config("TRADE_WRITER_MAX_BATCH_SIZE", default=50, cast=int)
+TRADE_WRITER_MAX_BATCH_DELAY_MS = config("TRADE_WRITER_MAX_BATCH_DELAY_MS", default=1000, cast=int)
+
+class TradeWriter:
+    """
+    Background writer that batches trade inserts off the strategy threads.
+    Strategies enqueue (agent_id, trade_data) and return immediately; a single daemon thread
+    drains the queue and writes each batch with crud.create_trades_bulk in its own session.
+    """
+
+    def __init__(self, max_batch_size: int = TRADE_WRITER_MAX_BATCH_SIZE, max_batch_delay_ms: int = TRADE_WRITER_MAX_BATCH_DELAY_MS):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_delay = max_batch_delay_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[int, Dict[str, Any]]]" = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name="TradeWriter", daemon=True)
+                self._thread.start()
+                log.info("TradeWriter started (max_batch_size=%d, max_batch_delay=%.3fs).", self.max_batch_size, self.max_batch_delay)
+
+    def enqueue(self, agent_id: int, trade_data: Dict[str, Any]):
+        """Queues a trade (Binance order fields plus optional 'pnl_usd') for the next batch."""
+        self._ensure_started()
+        self._queue.put((agent_id, trade_data))
+
+    def _collect_batch(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """Blocks for the first item, then gathers more until the batch is full or the delay expires."""
+        try:
+            batch = [self._queue.get(timeout=self.max_batch_delay)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_batch_delay
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, batch: List[Tuple[int, Dict[str, Any]]]):
+        by_agent: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for agent_id, trade_data in batch:
+            by_agent[agent_id].append(trade_data)
+
+        db = database.SessionLocal()
+        try:
+            for agent_id, trades in by_agent.items():
+                try:
+                    crud.create_trades_bulk(db, agent_id, trades)
+                    log.debug("TradeWriter wrote %d trades for agent %d.", len(trades), agent_id)
+                except ValueError as e:
+                    # One bad row fails the whole executemany (duplicates are already skipped); salvage the rest
+                    log.warning("Bulk trade insert failed for agent %d (%s); retrying row by row.", agent_id, e)
+                    for trade_data in trades:
+                        try:
+                            crud.create_trade(db, agent_id, trade_data, pnl_usd=trade_data.get("pnl_usd"))
+                        except Exception as row_err:
+                            log.error("Dropping trade %s for agent %d: %s", trade_data.get("orderId"), agent_id, row_err)
+                except Exception:
+                    log.exception("TradeWriter failed to write %d trades for agent %d.", len(trades), agent_id)
+        finally:
+            db.close()
+
+    def _run(self):
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            batch = self._collect_batch()
+            if batch:
+                self._write_batch(batch)
+        log.info("TradeWriter stopped.")
+
+    def close(self, timeout: float = 10.0):
+        """Flushes queued trades and stops the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            log.warning("TradeWriter did not drain within %.1fs; %d trades still queued.", timeout, self._queue.qsize())
+
+# Shared writer used by all strategies in this process
+trade_writer = TradeWriter()
+atexit.register(trade_writer.close)
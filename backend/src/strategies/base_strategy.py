@@ -1,33 +1,54 @@
 import logging
+import asyncio
 import threading
-import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
-from sqlalchemy.orm import Session
-import json # For parsing messages
 
 from ..core.binance_client import BinanceClientWrapper
 from ..persistence import crud, database, models
 from ..persistence.models import AgentStatusEnum
+from ..persistence.trade_writer import trade_writer
+from ..persistence.status_updater import status_updater
+from .runtime import strategy_runtime
 # Import communication bus
 from ..communication.redis_pubsub import CommunicationBus, AGENT_EVENTS_CHANNEL, GROUP_UPDATES_CHANNEL, LEARNING_MODULE_CHANNEL
 
 log = logging.getLogger(__name__)
 
+# Statuses written to the DB immediately; others are debounced by the StatusUpdater
+TERMINAL_STATUSES = frozenset({AgentStatusEnum.STOPPED, AgentStatusEnum.ERROR})
+
+DEFAULT_LOOP_INTERVAL_SECONDS = 10.0
+
 class BaseStrategy(ABC):
     """Abstract base class for trading strategies."""
 
-    def __init__(self, agent_id: int, config: Dict[str, Any], db_session: Session, binance_client: BinanceClientWrapper, comm_bus: Optional[CommunicationBus] = None):
+    # Fixed attribute layout (no per-instance __dict__); subclasses declare their own __slots__
+    __slots__ = (
+        "agent_id", "config", "binance_client", "comm_bus", "_stop_event", "_wake", "_run_future",
+        "strategy_name", "current_parameters", "_params_lock", "_loop_interval", "_group_id",
+    )
+
+    def __init__(self, agent_id: int, config: Dict[str, Any], binance_client: BinanceClientWrapper, comm_bus: Optional[CommunicationBus] = None):
         self.agent_id = agent_id
         self.config = config # Initial config
-        self.db: Session = db_session
+        # No long-lived DB session: each DB touch checks a connection out of the shared pool
+        # (database.SessionLocal) and returns it immediately, so idle agents hold no connection.
         self.binance_client = binance_client
         self.comm_bus = comm_bus # Optional communication bus instance
 
-        self._stop_event = threading.Event()
-        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event() # Checked by strategy logic running in executor threads
+        self._wake: Optional[asyncio.Event] = None # Wakes the run loop's sleeps; lives on the runtime loop
+        self._run_future: Optional[Future] = None
         self.strategy_name = self.__class__.__name__
         self.current_parameters = config.copy() # Store runtime parameters separately
+        # Scalars the run loop reads every tick, derived from current_parameters (see _refresh_derived_parameters)
+        self._params_lock = threading.Lock()
+        self._loop_interval: float = DEFAULT_LOOP_INTERVAL_SECONDS
+        self._refresh_derived_parameters()
+        # Group membership is resolved once; a "group_reassigned" message updates it
+        self._group_id: Optional[int] = self._get_group_id()
 
         log.info(f"[{self.strategy_name}-{self.agent_id}] Initializing strategy.")
 
@@ -38,52 +59,79 @@ class BaseStrategy(ABC):
              raise ConnectionError("Binance client not ready") # Prevent strategy start
 
     def _update_status(self, status: AgentStatusEnum, message: Optional[str] = None):
-        """Helper to update agent status in the database."""
+        """Helper to update agent status in the database (debounced, except for terminal statuses)."""
         try:
-            crud.update_agent_status(self.db, self.agent_id, status, message)
+            status_updater.set(self.agent_id, status, message, flush=status in TERMINAL_STATUSES)
             log.info(f"[{self.strategy_name}-{self.agent_id}] Status updated to {status.value}" + (f": {message}" if message else ""))
         except Exception as e:
             log.exception(f"[{self.strategy_name}-{self.agent_id}] CRITICAL: Failed to update agent status to {status.value} in DB: {e}")
             # This is serious, as the agent state might be inconsistent
 
-    def _record_trade(self, trade_data: Dict[str, Any]):
-        """Helper to record a trade in the database."""
+    def _record_trade(self, trade_data: Dict[str, Any], pnl_usd: Optional[float] = None):
+        """Helper to record a trade; the insert is batched by the background TradeWriter."""
         # Basic validation
         if not trade_data or not trade_data.get('orderId'):
             log.warning(f"[{self.strategy_name}-{self.agent_id}] Attempted to record invalid trade data: {trade_data}")
             return
         try:
             # TODO: Calculate PnL for the trade before saving (complex, requires tracking fills/positions)
-            trade_data['pnl_usd'] = None # Placeholder
-            crud.create_trade(self.db, self.agent_id, trade_data)
-            log.info(f"[{self.strategy_name}-{self.agent_id}] Trade recorded: OrderID {trade_data.get('orderId')}")
+            trade_data['pnl_usd'] = pnl_usd # None unless the strategy computed it
+            trade_writer.enqueue(self.agent_id, trade_data)
+            log.info(f"[{self.strategy_name}-{self.agent_id}] Trade queued for recording: OrderID {trade_data.get('orderId')}")
 
-            # Publish trade event (optional)
+            # Publish trade event (optional); queued so the trading path never waits on Redis
             if self.comm_bus and self.comm_bus.is_ready():
                  event_data = {
                      "type": "trade_executed",
                      "agent_id": self.agent_id,
-                     "group_id": crud.get_agent_by_id(self.db, self.agent_id).group_id, # Fetch group ID
+                     "group_id": self._group_id,
                      "payload": trade_data # Send Binance order data
                  }
-                 self.comm_bus.publish(AGENT_EVENTS_CHANNEL, event_data)
+                 self.comm_bus.publish_async(AGENT_EVENTS_CHANNEL, event_data)
 
         except Exception as e:
-            log.exception(f"[{self.strategy_name}-{self.agent_id}] Failed to record trade in DB: {e}")
+            log.exception(f"[{self.strategy_name}-{self.agent_id}] Failed to record trade: {e}")
 
     @abstractmethod
     def _run_logic(self):
         """The core trading logic loop specific to the strategy."""
         pass
 
+    def _on_start(self) -> bool:
+        """
+        One-time setup (e.g. placing initial orders), run in the runtime's executor before the first
+        iteration, so start() returns without waiting on the exchange. Return False to abort the start;
+        the hook is then responsible for the agent's status.
+        """
+        return True
+
     @abstractmethod
     def _adapt_parameters(self, new_params: Dict[str, Any]):
         """Applies updated parameters received from learning module/comm bus."""
-        # Example: self.current_parameters.update(new_params)
+        # Example: self._update_parameters(new_params)
         # Re-calculate grid lines, adjust order sizes etc. based on new params
         log.info(f"[{self.strategy_name}-{self.agent_id}] Adapting parameters (placeholder): {new_params}")
         pass
 
+    def _refresh_derived_parameters(self):
+        """
+        Recomputes per-tick scalars from current_parameters. Subclasses that derive their own values
+        (order sizes, tick sizes) extend this so _run_logic never re-derives them.
+        """
+        self._loop_interval = float(self.current_parameters.get("loop_interval_seconds", DEFAULT_LOOP_INTERVAL_SECONDS))
+
+    def _update_parameters(self, new_params: Dict[str, Any]):
+        """Merges new_params into current_parameters and refreshes derived scalars as one step."""
+        with self._params_lock:
+            self.current_parameters.update(new_params)
+            self._refresh_derived_parameters()
+
+    def _get_group_id(self) -> Optional[int]:
+        """Looks up the agent's current group ID."""
+        with database.SessionLocal() as db:
+            db_agent = crud.get_agent_by_id(db, self.agent_id)
+            return db_agent.group_id if db_agent else None
+
     def _handle_comm_message(self, message_data: Dict[str, Any]):
         """Handles messages received on subscribed communication channels."""
         log.debug(f"[{self.strategy_name}-{self.agent_id}] Received message: {message_data}")
@@ -99,21 +147,58 @@ class BaseStrategy(ABC):
             log.info(f"[{self.strategy_name}-{self.agent_id}] Received parameter update suggestion: {payload.get('params')}")
             # TODO: Add validation and safety checks before applying
             # self._adapt_parameters(payload.get('params', {}))
-        elif msg_type == "group_signal" and payload.get("group_id") == crud.get_agent_by_id(self.db, self.agent_id).group_id:
+        elif msg_type == "group_reassigned" and payload.get("agent_id") == self.agent_id:
+            self._group_id = payload.get("group_id")
+            log.info(f"[{self.strategy_name}-{self.agent_id}] Group reassigned to {self._group_id}")
+        elif msg_type == "group_signal" and payload.get("group_id") == self._group_id:
              log.info(f"[{self.strategy_name}-{self.agent_id}] Received group signal: {payload.get('signal')}")
              # TODO: Implement logic based on group signals (e.g., pause trading, adjust risk)
         else:
              log.debug(f"[{self.strategy_name}-{self.agent_id}] Ignoring irrelevant message type '{msg_type}' or target.")
 
 
-    def _run_loop(self):
-        """Internal method that runs the strategy logic in a loop."""
+    async def _sleep(self, seconds: float) -> bool:
+        """
+        Waits up to `seconds` on the runtime loop; returns True as soon as stop() is requested.
+        Also ends early (returning False) when _request_tick() asks for an immediate iteration.
+        """
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+        if self._stop_event.is_set():
+            return True
+        self._wake.clear() # Woken for an early tick, not to stop
+        return False
+
+    def _request_tick(self):
+        """Runs the next _run_logic iteration now instead of after the loop interval (callable from any thread)."""
+        if self._wake is not None:
+            strategy_runtime.call_soon(self._wake.set)
+
+    async def _run_loop(self):
+        """Internal coroutine that runs the strategy logic in a loop on the shared strategy runtime."""
         log.info(f"[{self.strategy_name}-{self.agent_id}] Starting run loop.")
+        loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        if self._stop_event.is_set(): # stop() raced ahead of the first wake-up event
+            self._wake.set()
+
+        # --- Strategy setup ---
+        try:
+            started = await loop.run_in_executor(None, self._on_start)
+        except Exception as e:
+            log.exception(f"[{self.strategy_name}-{self.agent_id}] Error during strategy setup: {e}")
+            await loop.run_in_executor(None, self._update_status, AgentStatusEnum.ERROR, f"Setup failed: {str(e)[:100]}")
+            return
+        if not started:
+            log.error(f"[{self.strategy_name}-{self.agent_id}] Strategy setup failed. Not starting run loop.")
+            return
 
         # --- Subscribe to relevant communication channels ---
         if self.comm_bus and self.comm_bus.is_ready():
              # Subscribe to messages targeted at this agent or its group
-             self.comm_bus.subscribe(LEARNING_MODULE_CHANNEL, self._handle_comm_message)
+             await loop.run_in_executor(None, self.comm_bus.subscribe, LEARNING_MODULE_CHANNEL, self._handle_comm_message)
              # Potentially subscribe to GROUP_UPDATES_CHANNEL as well if needed
              # self.comm_bus.subscribe(GROUP_UPDATES_CHANNEL, self._handle_comm_message)
         else:
@@ -122,84 +207,101 @@ class BaseStrategy(ABC):
         self._update_status(AgentStatusEnum.RUNNING)
         try:
             while not self._stop_event.is_set():
+                # --- Shared rate-limit backoff ---
+                # A 429/418 seen by any agent pauses the shared client; wait it out instead of ticking
+                pause = self.binance_client.pause_remaining() if self.binance_client else 0.0
+                if pause > 0:
+                    log.info(f"[{self.strategy_name}-{self.agent_id}] Binance rate-limit backoff active, pausing {pause:.1f}s.")
+                    if await self._sleep(pause):
+                        break
+                    continue
+
                 # --- Core Logic Execution ---
+                # Strategy logic makes blocking API/DB calls, so it runs in the executor, not on the loop
                 try:
-                    self._run_logic()
+                    await loop.run_in_executor(None, self._run_logic)
                 except BinanceAPIException as e: # Catch specific Binance errors if defined
                      log.error(f"[{self.strategy_name}-{self.agent_id}] Binance API Error in run loop: {e}. Status Code: {getattr(e, 'status_code', 'N/A')}, Message: {getattr(e, 'message', str(e))}")
                      # Decide on action: retry, stop, update status?
                      status_code = getattr(e, 'status_code', None)
                      if status_code == 429: # Rate limit
-                         log.warning(f"[{self.strategy_name}-{self.agent_id}] Rate limited. Sleeping for 60s.")
-                         time.sleep(60)
+                         # Honour the server's Retry-After, recorded on the shared client
+                         backoff = self.binance_client.pause_remaining() or 60
+                         log.warning(f"[{self.strategy_name}-{self.agent_id}] Rate limited. Sleeping for {backoff:.0f}s.")
+                         if await self._sleep(backoff):
+                             break
                      elif status_code == 418: # IP Banned
                           log.critical(f"[{self.strategy_name}-{self.agent_id}] IP Banned by Binance! Stopping agent.")
-                          self._update_status(AgentStatusEnum.ERROR, f"IP Banned by Binance: {getattr(e, 'message', str(e))}")
+                          await loop.run_in_executor(None, self._update_status, AgentStatusEnum.ERROR, f"IP Banned by Binance: {getattr(e, 'message', str(e))}")
                           self._stop_event.set() # Signal stop
                      else:
                           # Other API errors, maybe retry after a short delay
                           log.warning(f"[{self.strategy_name}-{self.agent_id}] Retrying after API error.")
-                          time.sleep(10)
+                          if await self._sleep(10):
+                              break
                 except Exception as e:
                     log.exception(f"[{self.strategy_name}-{self.agent_id}] Unhandled exception in strategy logic: {e}")
-                    self._update_status(AgentStatusEnum.ERROR, f"Unhandled exception: {str(e)[:200]}")
+                    await loop.run_in_executor(None, self._update_status, AgentStatusEnum.ERROR, f"Unhandled exception: {str(e)[:200]}")
                     # Consider stopping the agent on unhandled errors
                     break # Exit loop on critical error
 
-                # Check stop event again before sleeping
-                if self._stop_event.is_set():
-                    break
-
                 # --- Sleep ---
-                # Use current_parameters which might be adapted
-                loop_interval = self.current_parameters.get("loop_interval_seconds", 10)
-                time.sleep(loop_interval)
+                # Interval is refreshed whenever parameters are adapted. The wait ends early when stop() is called.
+                if await self._sleep(self._loop_interval):
+                    break
 
         except Exception as e:
              # Catch errors during loop setup/teardown (e.g., initial comm_bus subscription)
              log.exception(f"[{self.strategy_name}-{self.agent_id}] Critical error in run loop execution: {e}")
-             self._update_status(AgentStatusEnum.ERROR, f"Critical loop error: {str(e)[:200]}")
+             await loop.run_in_executor(None, self._update_status, AgentStatusEnum.ERROR, f"Critical loop error: {str(e)[:200]}")
         finally:
             log.info(f"[{self.strategy_name}-{self.agent_id}] Run loop finishing...")
             # Determine final status based on whether stop was requested or an error occurred
             final_status = AgentStatusEnum.STOPPED if self._stop_event.is_set() else AgentStatusEnum.ERROR
-            self._update_status(final_status, "Run loop terminated")
-            # Close the dedicated DB session for this thread
-            if self.db:
-                 self.db.close()
-                 log.info(f"[{self.strategy_name}-{self.agent_id}] DB session closed.")
-            # Note: CommBus listener thread is managed separately and not stopped here.
+            # Terminal statuses are written synchronously; keep that DB call off the event loop
+            await loop.run_in_executor(None, self._update_status, final_status, "Run loop terminated")
+            # The bus (and its listener thread) is shared; only drop this agent's handler
+            if self.comm_bus:
+                await loop.run_in_executor(None, self.comm_bus.unsubscribe, LEARNING_MODULE_CHANNEL, self._handle_comm_message)
+
+    def is_running(self) -> bool:
+        """True while the strategy's run loop is scheduled or executing."""
+        return self._run_future is not None and not self._run_future.done()
 
     def start(self):
-        """Starts the strategy execution in a separate thread."""
-        if self._thread is not None and self._thread.is_alive():
-            log.warning(f"[{self.strategy_name}-{self.agent_id}] Strategy thread already running.")
+        """Schedules the strategy's run loop on the shared strategy runtime."""
+        if self.is_running():
+            log.warning(f"[{self.strategy_name}-{self.agent_id}] Strategy already running.")
             return
 
-        log.info(f"[{self.strategy_name}-{self.agent_id}] Creating and starting strategy thread.")
+        log.info(f"[{self.strategy_name}-{self.agent_id}] Scheduling strategy run loop.")
         self._stop_event.clear()
-        # Ensure the target is the internal loop runner
-        self._thread = threading.Thread(target=self._run_loop, name=f"{self.strategy_name}-{self.agent_id}", daemon=True)
-        self._thread.start()
+        self._wake = None
+        self._run_future = strategy_runtime.submit(self._run_loop())
 
     def stop(self):
-        """Signals the strategy execution thread to stop."""
-        if self._thread is None or not self._thread.is_alive():
-            log.warning(f"[{self.strategy_name}-{self.agent_id}] Strategy thread is not running or already stopped.")
-            # Ensure status is updated if thread died unexpectedly
-            current_status = crud.get_agent_by_id(self.db, self.agent_id).status
+        """Signals the strategy run loop to stop and waits briefly for it to finish."""
+        if not self.is_running():
+            log.warning(f"[{self.strategy_name}-{self.agent_id}] Strategy is not running or already stopped.")
+            # Ensure status is updated if the run loop died unexpectedly
+            with database.SessionLocal() as db:
+                current_status = crud.get_agent_by_id(db, self.agent_id).status
             if current_status not in [AgentStatusEnum.STOPPED, AgentStatusEnum.STOPPING]:
-                 self._update_status(AgentStatusEnum.STOPPED, "Stop requested but thread not found/alive")
+                 self._update_status(AgentStatusEnum.STOPPED, "Stop requested but run loop not found/alive")
             return
 
-        log.info(f"[{self.strategy_name}-{self.agent_id}] Signaling strategy thread to stop.")
+        log.info(f"[{self.strategy_name}-{self.agent_id}] Signaling strategy run loop to stop.")
         self._stop_event.set()
-        # Optional: Wait for thread to finish with a timeout
-        # self._thread.join(timeout=30)
-        # if self._thread.is_alive():
-        #     log.warning(f"[{self.strategy_name}-{self.agent_id}] Strategy thread did not stop within timeout.")
-        # else:
-        #     log.info(f"[{self.strategy_name}-{self.agent_id}] Strategy thread stopped.")
+        if self._wake is not None:
+            strategy_runtime.call_soon(self._wake.set)
+        # The loop exits as soon as the current iteration finishes
+        try:
+            self._run_future.result(timeout=5)
+            log.info(f"[{self.strategy_name}-{self.agent_id}] Strategy run loop stopped.")
+        except FutureTimeoutError:
+            log.warning(f"[{self.strategy_name}-{self.agent_id}] Strategy run loop did not stop within timeout.")
+        except Exception as e:
+            log.exception(f"[{self.strategy_name}-{self.agent_id}] Strategy run loop ended with an error: {e}")
 
 # --- Custom Exceptions ---
 class StrategyConfigError(ValueError):
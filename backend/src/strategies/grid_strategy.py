@@ -1,8 +1,12 @@
 import logging
+import queue
+import threading
 import time
 import math
+from dataclasses import dataclass
 from decimal import Decimal, ROUND_DOWN, ROUND_UP # For precise calculations
 from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 
 from .base_strategy import BaseStrategy, StrategyConfigError, BinanceAPIException
 from ..persistence.models import AgentStatusEnum
@@ -17,6 +21,71 @@ ORDER_STATUS_CANCELED = 'CANCELED'
 ORDER_STATUS_REJECTED = 'REJECTED'
 ORDER_STATUS_EXPIRED = 'EXPIRED'
 
+ORDER_FINAL_STATUSES = frozenset({ORDER_STATUS_FILLED, ORDER_STATUS_CANCELED, ORDER_STATUS_REJECTED, ORDER_STATUS_EXPIRED})
+
+# Column of GridStrategy.orders_by_level for each order side
+SIDE_COLUMN = {'BUY': 0, 'SELL': 1}
+
+# With the user data stream active, polling is only a fallback to catch missed events
+ORDER_RECONCILE_INTERVAL_SECONDS = 60.0
+
+# Decimal digits per long-division step in _floor_div_scaled; keeps remainder * 10**digits within int64
+_DIV_BLOCK_DIGITS = 4
+
+def _floor_div_scaled(numerator: int, denominators: np.ndarray, digits: int) -> np.ndarray:
+    """
+    Element-wise floor(numerator * 10**digits / denominators) in int64, computed by long division a few
+    digits at a time so no intermediate overflows (denominators must stay below 2**63 / 10**_DIV_BLOCK_DIGITS
+    and the result below 2**63; callers check both).
+    Exact, unlike dividing in float64.
+    """
+    quotient, remainder = np.divmod(np.int64(numerator), denominators)
+    while digits > 0:
+        block = min(digits, _DIV_BLOCK_DIGITS)
+        digits_q, remainder = np.divmod(remainder * 10 ** block, denominators)
+        quotient = quotient * 10 ** block + digits_q
+        digits -= block
+    return quotient
+
+def _format_scaled(values_i: np.ndarray, precision: int) -> List[str]:
+    """Formats int-scaled values (units of 10**-precision) as fixed-point strings without going through Decimal."""
+    if precision == 0:
+        return [str(value) for value in values_i.tolist()]
+    scale = 10 ** precision
+    return [f"{value // scale}.{value % scale:0{precision}d}" for value in values_i.tolist()]
+
+def _decimal_places(increment: Decimal) -> int:
+    """Digits after the point in an exchange increment such as tickSize '0.01000000' (-> 2)."""
+    return max(0, -increment.normalize().as_tuple().exponent)
+
+@dataclass(slots=True)
+class OrderRecord:
+    """An open order tracked by the grid, with its price/quantity parsed once at placement."""
+    side: str # 'BUY' or 'SELL'
+    price: Decimal
+    quantity: Decimal
+    quantity_i: int # quantity in units of 10**-qty_precision
+    order_id: Any
+    client_id: str
+    status: str
+    level: int # Index into the grid arrays
+    order: Dict[str, Any] # Exchange response, as returned by create_limit_order
+
+    @classmethod
+    def from_order(cls, order: Dict[str, Any], level: int, qty_scale: int) -> "OrderRecord":
+        quantity = Decimal(order['origQty'])
+        return cls(
+            side=order['side'],
+            price=Decimal(order['price']),
+            quantity=quantity,
+            quantity_i=int(quantity * qty_scale),
+            order_id=order['orderId'],
+            client_id=order['clientOrderId'],
+            status=order.get('status', ORDER_STATUS_NEW),
+            level=level,
+            order=order,
+        )
+
 class GridStrategy(BaseStrategy):
     """
     Implements a basic grid trading strategy.
@@ -25,6 +94,15 @@ class GridStrategy(BaseStrategy):
     aiming to profit from price fluctuations within a defined range.
     """
 
+    __slots__ = (
+        "symbol", "lower_price", "upper_price", "grid_levels", "order_amount_usd",
+        "price_precision", "qty_precision", "price_scale", "qty_scale", "pnl_scale", "min_qty_i", "tick_i", "lot_i",
+        "grid_lines_i", "order_qty_i", "step_size_i", "step_size", "next_sell_level", "next_buy_level",
+        "price_str_at", "qty_str_at", "last_price",
+        "open_orders", "_orders_lock", "orders_by_level", "level_of_client",
+        "_order_events", "_user_stream_active", "_last_reconcile",
+    )
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.strategy_name = "GridStrategy" # Override for logging
@@ -33,13 +111,42 @@ class GridStrategy(BaseStrategy):
         self.upper_price: Decimal = Decimal(0)
         self.grid_levels: int = 0
         self.order_amount_usd: Decimal = Decimal(0)
-        self.grid_lines: List[Decimal] = []
+        # Grid as int-scaled arrays (structure of arrays): prices in units of 10**-price_precision,
+        # quantities in units of 10**-qty_precision. Decimal is only used at the API/formatting boundary.
+        self.price_precision: int = 8
+        self.qty_precision: int = 8
+        self.price_scale: int = 10 ** self.price_precision
+        self.qty_scale: int = 10 ** self.qty_precision
+        self.pnl_scale: int = self.price_scale * self.qty_scale # price_i * qty_i -> quote units
+        self.min_qty_i: int = 1 # Smallest order quantity the exchange accepts, in qty units
+        # Exchange price tick (PRICE_FILTER.tickSize) and lot step (LOT_SIZE.stepSize) in scaled units;
+        # prices and quantities are snapped to multiples of these
+        self.tick_i: int = 1
+        self.lot_i: int = 1
+        self.grid_lines_i: np.ndarray = np.empty(0, dtype=np.int64)
+        self.order_qty_i: np.ndarray = np.empty(0, dtype=np.int64) # Order quantity per grid level
+        self.step_size_i: int = 0
         self.step_size: Decimal = Decimal(0)
+        # Level of the opposing order placed when an order at each level fills (None at the grid edges)
+        self.next_sell_level: List[Optional[int]] = []
+        self.next_buy_level: List[Optional[int]] = []
+        # Order price/quantity per level, formatted once for the API
+        self.price_str_at: List[str] = []
+        self.qty_str_at: List[str] = []
         self.last_price: Optional[Decimal] = None
 
         # Runtime state (simple in-memory tracking for MVP)
-        self.open_buy_orders: Dict[str, Dict] = {} # {clientOrderId: order_details}
-        self.open_sell_orders: Dict[str, Dict] = {} # {clientOrderId: order_details}
+        # {clientOrderId: OrderRecord}. Copy-on-write: mutations build a new dict under _orders_lock and
+        # swap it in, so the run loop and stop() can iterate the current dict without copying or locking.
+        self.open_orders: Dict[str, OrderRecord] = {}
+        self._orders_lock = threading.Lock()
+        # Working order per (grid level, side column), so neighbour lookups are array indexing
+        self.orders_by_level: np.ndarray = np.empty((0, 2), dtype=object)
+        self.level_of_client: Dict[str, int] = {}
+        # Final order states pushed by the user data stream, applied on the run loop (single writer)
+        self._order_events: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue()
+        self._user_stream_active = False
+        self._last_reconcile = 0.0 # time.monotonic() of the last polling check
 
         self._validate_and_set_config()
         log.info(f"[{self.strategy_name}-{self.agent_id}] Initialized for {self.symbol} "
@@ -69,12 +176,66 @@ class GridStrategy(BaseStrategy):
         if self.order_amount_usd <= 0:
              raise StrategyConfigError("order_amount_usd must be positive")
 
-        # Calculate grid lines (simple linear grid for MVP)
-        self.step_size = (self.upper_price - self.lower_price) / Decimal(self.grid_levels - 1)
-        self.grid_lines = [self.lower_price + i * self.step_size for i in range(self.grid_levels)]
-        log.debug(f"[{self.strategy_name}-{self.agent_id}] Calculated grid lines: {self.grid_lines}")
-
-        # TODO: Fetch symbol info from Binance (min order size, price/qty precision) and validate config against it.
+        # Price/qty precision and minimums from the symbol's exchange filters (cached process-wide)
+        filters = self.binance_client.get_symbol_filters(self.symbol) if self.binance_client else None
+        if filters:
+            if filters["tick_size"] > 0: self.price_precision = _decimal_places(filters["tick_size"])
+            if filters["step_size"] > 0: self.qty_precision = _decimal_places(filters["step_size"])
+            if self.order_amount_usd < filters["min_notional"]:
+                raise StrategyConfigError(f"order_amount_usd is below the {self.symbol} minimum notional of {filters['min_notional']}")
+        else:
+            log.warning(f"[{self.strategy_name}-{self.agent_id}] Symbol filters for {self.symbol} unavailable; using default precision.")
+        self.price_scale = 10 ** self.price_precision
+        self.qty_scale = 10 ** self.qty_precision
+        self.pnl_scale = self.price_scale * self.qty_scale
+        if filters:
+            self.min_qty_i = max(1, int(filters["min_qty"] * self.qty_scale))
+            self.tick_i = max(1, int(filters["tick_size"] * self.price_scale))
+            self.lot_i = max(1, int(filters["step_size"] * self.qty_scale))
+
+        # Calculate grid lines (simple linear grid for MVP) as integers, on multiples of the price tick
+        tick_i = self.tick_i
+        lower_i = -(-self._to_price_i(self.lower_price) // tick_i) * tick_i # Rounded up onto a tick
+        upper_i = self._to_price_i(self.upper_price)
+        if lower_i <= 0:
+            raise StrategyConfigError("lower_price must be at least one price tick")
+        self.step_size_i = (upper_i - lower_i) // (self.grid_levels - 1) // tick_i * tick_i # Rounded down to a whole tick
+        if self.step_size_i <= 0:
+            raise StrategyConfigError("Price range is too narrow for the number of grid levels")
+        self.step_size = self._from_price_i(self.step_size_i)
+        self.grid_lines_i = np.arange(self.grid_levels, dtype=np.int64) * self.step_size_i + lower_i
+        log.debug(f"[{self.strategy_name}-{self.agent_id}] Calculated grid lines: {[str(self._from_price_i(p)) for p in self.grid_lines_i]}")
+
+        # Order size per level (order_amount_usd / price, rounded down to a qty step) only depends on the
+        # config, so derive it once here, vectorized over all levels
+        int64_max = int(np.iinfo(np.int64).max)
+        if int(self.grid_lines_i[-1]) >= int64_max // 10 ** _DIV_BLOCK_DIGITS:
+            raise StrategyConfigError("upper_price is too large")
+        amount_i = int(self.order_amount_usd * self.price_scale) # USD in price ticks
+        # The largest quantity (at the lowest line) must also fit in int64, or the long division wraps
+        if amount_i >= int64_max or amount_i * self.qty_scale // lower_i >= int64_max:
+            raise StrategyConfigError("order_amount_usd is too large for the grid's lowest price")
+        self.order_qty_i = _floor_div_scaled(amount_i, self.grid_lines_i, self.qty_precision)
+        if self.lot_i > 1:
+            self.order_qty_i -= self.order_qty_i % self.lot_i # Rounded down to a whole lot step
+        self.price_str_at = _format_scaled(self.grid_lines_i, self.price_precision)
+        self.qty_str_at = _format_scaled(self.order_qty_i, self.qty_precision)
+        self.orders_by_level = np.full((self.grid_levels, 2), None, dtype=object)
+        self.level_of_client = {}
+        self.next_sell_level = [level + 1 if level + 1 < self.grid_levels else None for level in range(self.grid_levels)]
+        self.next_buy_level = [level - 1 if level > 0 else None for level in range(self.grid_levels)]
+
+    # --- Int-scaled price/quantity conversions (Decimal only at the boundary) ---
+
+    def _to_price_i(self, price: Decimal) -> int:
+        """Converts a price to integer ticks, rounding down."""
+        return int((price * self.price_scale).to_integral_value(rounding=ROUND_DOWN))
+
+    def _from_price_i(self, price_i: int) -> Decimal:
+        return Decimal(int(price_i)).scaleb(-self.price_precision)
+
+    def _from_qty_i(self, qty_i: int) -> Decimal:
+        return Decimal(int(qty_i)).scaleb(-self.qty_precision)
 
     def _get_current_price(self) -> Optional[Decimal]:
         """Fetches and returns the current market price."""
@@ -103,181 +264,268 @@ class GridStrategy(BaseStrategy):
 
         # Cancel any existing open orders for this agent first (safety measure)
         self._cancel_all_open_orders()
-        time.sleep(1) # Small delay after cancelling
-
-        # Determine quantity based on USD amount and price level
-        # TODO: Use proper precision from symbol info
-        qty_precision = 8 # Placeholder
-
-        for price in self.grid_lines:
-            if self._stop_event.is_set(): return # Check if stopped during placement
-
-            order_qty = (self.order_amount_usd / price).quantize(Decimal(f'1e-{qty_precision}'), rounding=ROUND_DOWN)
-            # TODO: Check against min/max order size from symbol info
 
-            if order_qty <= 0:
-                 log.warning(f"[{self.strategy_name}-{self.agent_id}] Calculated order quantity is zero or less for price {price}. Skipping.")
+        # Build the whole grid in one pass (quantity per level was precomputed with the grid lines),
+        # then submit it concurrently instead of one order per round trip. Comparisons are integer ops.
+        current_price_i = self._to_price_i(current_price)
+        orders = []
+        levels = []
+        # Loop-invariant attributes bound once as locals
+        symbol, price_str_at, qty_str_at = self.symbol, self.price_str_at, self.qty_str_at
+        for level, (price_i, qty_i) in enumerate(zip(self.grid_lines_i.tolist(), self.order_qty_i.tolist())):
+            if price_i == current_price_i:
+                continue # No order at the current price level
+            if qty_i < self.min_qty_i:
+                 log.warning(f"[{self.strategy_name}-{self.agent_id}] Calculated order quantity is below the symbol minimum for price {self._from_price_i(price_i)}. Skipping.")
                  continue
-
-            price_str = f"{price:.8f}" # TODO: Use price precision from symbol info
-
-            if price < current_price:
-                # Place BUY order
-                log.debug(f"[{self.strategy_name}-{self.agent_id}] Placing BUY @ {price_str}, Qty: {order_qty}")
-                order = self.binance_client.create_limit_order(
-                    symbol=self.symbol, side='BUY', quantity=float(order_qty), price=float(price)
-                )
-                if order:
-                    self.open_buy_orders[order['clientOrderId']] = order # Track open order
-                else:
-                    log.error(f"[{self.strategy_name}-{self.agent_id}] Failed to place BUY order at {price_str}")
-                    # Consider stopping or retrying based on error
-
-            elif price > current_price:
-                # Place SELL order
-                log.debug(f"[{self.strategy_name}-{self.agent_id}] Placing SELL @ {price_str}, Qty: {order_qty}")
-                order = self.binance_client.create_limit_order(
-                    symbol=self.symbol, side='SELL', quantity=float(order_qty), price=float(price)
-                )
-                if order:
-                    self.open_sell_orders[order['clientOrderId']] = order # Track open order
-                else:
-                    log.error(f"[{self.strategy_name}-{self.agent_id}] Failed to place SELL order at {price_str}")
-
-            time.sleep(0.2) # Small delay between orders to avoid rate limits
-
-        log.info(f"[{self.strategy_name}-{self.agent_id}] Initial grid placement complete. Buys: {len(self.open_buy_orders)}, Sells: {len(self.open_sell_orders)}")
+            side = 'BUY' if price_i < current_price_i else 'SELL'
+            orders.append({
+                "symbol": symbol, "side": side,
+                "quantity": qty_str_at[level], "price": price_str_at[level],
+            })
+            levels.append(level)
+
+        if self._stop_event.is_set(): return # Check if stopped before placement
+        log.debug(f"[{self.strategy_name}-{self.agent_id}] Submitting {len(orders)} grid orders")
+        placed = []
+        for level, request, order in zip(levels, orders, self.binance_client.create_limit_orders(orders)):
+            if not order:
+                log.error(f"[{self.strategy_name}-{self.agent_id}] Failed to place {request['side']} order at {request['price']}")
+                continue
+            placed.append((level, order))
+        self._track_orders(placed)
+
+        buys = sum(1 for record in self.open_orders.values() if record.side == 'BUY')
+        log.info(f"[{self.strategy_name}-{self.agent_id}] Initial grid placement complete. Buys: {buys}, Sells: {len(self.open_orders) - buys}")
+
+    # --- Open order tracking ---
+
+    def _track_orders(self, orders: List[Tuple[int, Dict[str, Any]]]):
+        """Adds placed (level, order) pairs to open_orders in one copy-on-write swap and indexes them by level."""
+        if not orders:
+            return
+        records = [OrderRecord.from_order(order, level, self.qty_scale) for level, order in orders]
+        with self._orders_lock:
+            open_orders = dict(self.open_orders)
+            for record in records:
+                open_orders[record.client_id] = record
+                self.orders_by_level[record.level, SIDE_COLUMN[record.side]] = record
+                self.level_of_client[record.client_id] = record.level
+            self.open_orders = open_orders
+
+    def _untrack_orders(self, client_ids: List[str]):
+        """Removes orders from open_orders in one copy-on-write swap."""
+        if not client_ids:
+            return
+        with self._orders_lock:
+            open_orders = dict(self.open_orders)
+            for client_id in client_ids:
+                record = open_orders.pop(client_id, None)
+                self.level_of_client.pop(client_id, None)
+                if record is not None and self.orders_by_level[record.level, SIDE_COLUMN[record.side]] is record:
+                    self.orders_by_level[record.level, SIDE_COLUMN[record.side]] = None
+            self.open_orders = open_orders
 
     def _check_and_replace_orders(self):
         """Checks status of open orders and places opposing orders when filled."""
         log.debug(f"[{self.strategy_name}-{self.agent_id}] Checking open orders...")
-        if not self.open_buy_orders and not self.open_sell_orders:
+        open_orders = self.open_orders # Current snapshot; later swaps don't affect this iteration
+        if not open_orders:
              log.warning(f"[{self.strategy_name}-{self.agent_id}] No open orders found. Re-placing initial grid.")
              # This might happen if all orders were cancelled or filled unexpectedly
              self._place_initial_orders()
              return
 
-        # Combine orders for checking (create copies to avoid modifying during iteration)
-        orders_to_check = list(self.open_buy_orders.values()) + list(self.open_sell_orders.values())
+        # One openOrders call per tick: tracked orders still listed there are working and need no
+        # further request; only the ones that dropped off are looked up individually
+        live_orders = self.binance_client.get_open_orders(self.symbol)
+        if live_orders is None:
+            log.warning(f"[{self.strategy_name}-{self.agent_id}] Could not fetch open orders for {self.symbol}. Skipping check.")
+            return
+        live_client_ids = {live.get('clientOrderId') for live in live_orders}
+
+        # Finished orders and their replacements are applied after the scan, in one swap each
+        finished: List[str] = []
+        replacements: List[Tuple[str, int, str]] = [] # (side, level, quantity string)
+
+        # Loop-invariant attributes bound once as locals
+        symbol, stop_is_set, get_order = self.symbol, self._stop_event.is_set, self.binance_client.get_order
 
-        for order in orders_to_check:
-            if self._stop_event.is_set(): return
-            order_id = order.get('orderId')
-            client_order_id = order.get('clientOrderId')
+        # Set difference (in C) instead of a Python-level pass over every tracked order: on a quiet
+        # tick nothing dropped off and the loop body never runs
+        for client_order_id in open_orders.keys() - live_client_ids:
+            if stop_is_set(): break
+            record = open_orders[client_order_id]
+            order_id = record.order_id
             if not order_id or not client_order_id: continue # Skip if missing IDs
 
             try:
-                # Query order status from Binance
-                # TODO: Implement get_order method in binance_client
-                # order_status = self.binance_client.get_order(symbol=self.symbol, orderId=order_id)
-                # For MVP - simulate checking status (replace with actual API call)
-                order_status = self._simulate_get_order_status(order)
-                time.sleep(0.1) # Small delay
+                # No longer open: fetch its final state (FILLED vs CANCELED/EXPIRED/REJECTED)
+                order_status = get_order(symbol=symbol, order_id=order_id)
 
                 if not order_status:
                     log.warning(f"[{self.strategy_name}-{self.agent_id}] Could not get status for order {order_id}. Skipping.")
                     continue
 
-                status = order_status.get('status')
-                log.debug(f"[{self.strategy_name}-{self.agent_id}] Order {order_id} status: {status}")
-
-                if status == ORDER_STATUS_FILLED:
-                    log.info(f"[{self.strategy_name}-{self.agent_id}] Order FILLED: {order['side']} {order['origQty']} @ {order['price']}")
-
-                    # --- PnL Calculation (Simplified Example) ---
-                    trade_pnl: Optional[float] = None
-                    try:
-                        filled_qty = Decimal(order_status.get('executedQty', '0'))
-                        filled_price = Decimal(order_status.get('price', '0')) # Price level of the filled order
-                        commission = Decimal(order_status.get('commission', '0') or '0')
-                        # TODO: Handle commission asset conversion to quote asset (USD)
-
-                        if order['side'] == 'SELL' and filled_qty > 0:
-                            # Assume this SELL closes a previous BUY at the grid level below
-                            # WARNING: Highly simplified, needs proper position/cost basis tracking
-                            buy_price_level = filled_price - self.step_size
-                            # Calculate approximate PnL for this pair of trades
-                            pnl = (filled_price - buy_price_level) * filled_qty - commission # Simplified PnL
-                            trade_pnl = float(pnl)
-                            log.info(f"[{self.strategy_name}-{self.agent_id}] Calculated PnL for sell @ {filled_price}: {trade_pnl:.4f} USD (Simplified)")
-                        elif order['side'] == 'BUY':
-                             # PnL is typically realized on the closing (SELL) trade in this simple model
-                             pass
-
-                    except Exception as pnl_err:
-                         log.error(f"[{self.strategy_name}-{self.agent_id}] Error calculating PnL for order {order_id}: {pnl_err}")
-
-                    # Record the filled trade, passing the calculated PnL
-                    self._record_trade(order_status, pnl_usd=trade_pnl) # Pass full status dict and PnL
-
-                    # Remove from open orders tracking
-                    if order['side'] == 'BUY':
-                        self.open_buy_orders.pop(client_order_id, None)
-                        # Place corresponding SELL order one grid level up
-                        filled_price = Decimal(order['price'])
-                        sell_price = filled_price + self.step_size
-                        if sell_price <= self.upper_price:
-                             self._place_single_order('SELL', sell_price, Decimal(order['origQty']))
-                        else:
-                             log.info(f"[{self.strategy_name}-{self.agent_id}] Buy filled at {filled_price}, but next sell level {sell_price} is above upper bound. Not placing sell.")
-                    else: # SELL filled
-                        self.open_sell_orders.pop(client_order_id, None)
-                        # Place corresponding BUY order one grid level down
-                        filled_price = Decimal(order['price'])
-                        buy_price = filled_price - self.step_size
-                        if buy_price >= self.lower_price:
-                             self._place_single_order('BUY', buy_price, Decimal(order['origQty']))
-                        else:
-                             log.info(f"[{self.strategy_name}-{self.agent_id}] Sell filled at {filled_price}, but next buy level {buy_price} is below lower bound. Not placing buy.")
-
-                elif status in [ORDER_STATUS_CANCELED, ORDER_STATUS_REJECTED, ORDER_STATUS_EXPIRED]:
-                    log.warning(f"[{self.strategy_name}-{self.agent_id}] Order {order_id} is {status}. Removing from tracking.")
-                    # Remove from tracking, might need logic to replace it depending on strategy
-                    if order['side'] == 'BUY':
-                        self.open_buy_orders.pop(client_order_id, None)
-                    else:
-                        self.open_sell_orders.pop(client_order_id, None)
-                    # TODO: Consider logic to replace cancelled/expired orders to maintain grid density
-
+                self._resolve_order(record, order_status, finished, replacements)
             except Exception as e:
                 log.exception(f"[{self.strategy_name}-{self.agent_id}] Error checking order {order_id}: {e}")
 
-    def _place_single_order(self, side: str, price: Decimal, quantity: Decimal):
-        """Places a single limit order and tracks it."""
+        self._apply_resolutions(finished, replacements)
+
+    def _resolve_order(self, record: OrderRecord, order_status: Dict[str, Any], finished: List[str], replacements: List[Tuple[str, int, str]]):
+        """
+        Handles an order's reported state: a fill is recorded and queues the opposing order one level away;
+        a cancel/reject/expiry only stops tracking it. Results are collected for _apply_resolutions.
+        """
+        order_id = record.order_id
+        client_order_id = record.client_id
+        status = order_status.get('status')
+        log.debug(f"[{self.strategy_name}-{self.agent_id}] Order {order_id} status: {status}")
+
+        if status == ORDER_STATUS_FILLED:
+            log.info(f"[{self.strategy_name}-{self.agent_id}] Order FILLED: {record.side} {record.quantity} @ {record.price}")
+
+            # --- PnL Calculation (Simplified Example) ---
+            trade_pnl: Optional[float] = None
+            try:
+                # TODO: Handle commission asset conversion to quote asset (USD)
+                commission = float(order_status.get('commission') or 0)
+
+                if record.side == 'SELL' and record.quantity_i > 0:
+                    # Assume this SELL closes a previous BUY at the grid level below
+                    # WARNING: Highly simplified, needs proper position/cost basis tracking
+                    # A FILLED order executed its whole quantity, so the gross is one grid step times the
+                    # quantity parsed at placement: an int multiply, no Decimal work per fill
+                    trade_pnl = self.step_size_i * record.quantity_i / self.pnl_scale - commission # Simplified PnL
+                    log.info(f"[{self.strategy_name}-{self.agent_id}] Calculated PnL for sell @ {self.price_str_at[record.level]}: {trade_pnl:.4f} USD (Simplified)")
+                elif record.side == 'BUY':
+                     # PnL is typically realized on the closing (SELL) trade in this simple model
+                     pass
+
+            except Exception as pnl_err:
+                 log.error(f"[{self.strategy_name}-{self.agent_id}] Error calculating PnL for order {order_id}: {pnl_err}")
+
+            # Record the filled trade, passing the calculated PnL
+            self._record_trade(order_status, pnl_usd=trade_pnl) # Pass full status dict and PnL
+
+            # Remove from open orders tracking
+            finished.append(client_order_id)
+            if record.side == 'BUY':
+                # Place corresponding SELL order one grid level up
+                new_level = self.next_sell_level[record.level]
+                if new_level is not None:
+                     replacements.append(('SELL', new_level, record.order['origQty']))
+                else:
+                     log.info(f"[{self.strategy_name}-{self.agent_id}] Buy filled at {record.price}, the top grid level. Not placing sell.")
+            else: # SELL filled
+                # Place corresponding BUY order one grid level down
+                new_level = self.next_buy_level[record.level]
+                if new_level is not None:
+                     replacements.append(('BUY', new_level, record.order['origQty']))
+                else:
+                     log.info(f"[{self.strategy_name}-{self.agent_id}] Sell filled at {record.price}, the bottom grid level. Not placing buy.")
+
+        elif status in [ORDER_STATUS_CANCELED, ORDER_STATUS_REJECTED, ORDER_STATUS_EXPIRED]:
+            log.warning(f"[{self.strategy_name}-{self.agent_id}] Order {order_id} is {status}. Removing from tracking.")
+            # Remove from tracking, might need logic to replace it depending on strategy
+            finished.append(client_order_id)
+            # TODO: Consider logic to replace cancelled/expired orders to maintain grid density
+
+
+    def _apply_resolutions(self, finished: List[str], replacements: List[Tuple[str, int, str]]):
+        """Untracks finished orders in one swap, then places their replacements on free levels."""
+        self._untrack_orders(finished)
+        for side, level, quantity in replacements:
+            if self.orders_by_level[level, SIDE_COLUMN[side]] is not None:
+                log.info(f"[{self.strategy_name}-{self.agent_id}] A {side} order is already working at level {level}. Not placing another.")
+                continue
+            self._place_single_order(side, level, quantity)
+
+    # --- User data stream ---
+
+    def _handle_execution_report(self, event: Dict[str, Any]):
+        """User data stream callback (websocket thread): queues final states of this agent's orders."""
+        if event.get('e') != 'executionReport' or event.get('s') != self.symbol:
+            return
+        status = event.get('X')
+        if status not in ORDER_FINAL_STATUSES:
+            return
+        client_order_id = event.get('C') or event.get('c') # 'C' is the original id on cancels
+        if client_order_id not in self.open_orders:
+            return
+        # Same shape as a get_order response, so _resolve_order and _record_trade handle both
+        order_status = {
+            "symbol": event.get('s'), "orderId": event.get('i'), "clientOrderId": client_order_id,
+            "side": event.get('S'), "price": event.get('p'), "origQty": event.get('q'),
+            "executedQty": event.get('z'), "cummulativeQuoteQty": event.get('Z'), "status": status,
+            "commission": event.get('n'), "commissionAsset": event.get('N'), "time": event.get('T'),
+        }
+        self._order_events.put((client_order_id, order_status))
+        self._request_tick()
+
+    def _process_order_events(self):
+        """Applies order states received from the user data stream since the last tick."""
+        finished: List[str] = []
+        replacements: List[Tuple[str, int, str]] = []
+        while True:
+            try:
+                client_order_id, order_status = self._order_events.get_nowait()
+            except queue.Empty:
+                break
+            record = self.open_orders.get(client_order_id)
+            if record is None or client_order_id in finished:
+                continue # Already resolved (e.g. by a reconciliation poll)
+            try:
+                self._resolve_order(record, order_status, finished, replacements)
+            except Exception as e:
+                log.exception(f"[{self.strategy_name}-{self.agent_id}] Error handling order event for {record.order_id}: {e}")
+        self._apply_resolutions(finished, replacements)
+
+    def _place_single_order(self, side: str, level: int, quantity: str):
+        """Places a single limit order at a grid level and tracks it. `quantity` is sent as given (the filled order's origQty)."""
         if self._stop_event.is_set(): return
 
-        # TODO: Use precision from symbol info
-        price_str = f"{price:.8f}"
-        qty_str = f"{quantity:.8f}"
-        log.info(f"[{self.strategy_name}-{self.agent_id}] Placing single order: {side} {qty_str} {self.symbol} @ {price_str}")
+        price_str = self.price_str_at[level]
+        log.info(f"[{self.strategy_name}-{self.agent_id}] Placing single order: {side} {quantity} {self.symbol} @ {price_str}")
 
         order = self.binance_client.create_limit_order(
-            symbol=self.symbol, side=side, quantity=float(quantity), price=float(price)
+            symbol=self.symbol, side=side, quantity=quantity, price=price_str
         )
 
         if order:
-            client_order_id = order['clientOrderId']
-            if side == 'BUY':
-                self.open_buy_orders[client_order_id] = order
-            else:
-                self.open_sell_orders[client_order_id] = order
+            self._track_orders([(level, order)])
             log.info(f"[{self.strategy_name}-{self.agent_id}] Single {side} order placed: ID {order['orderId']}")
         else:
             log.error(f"[{self.strategy_name}-{self.agent_id}] Failed to place single {side} order at {price_str}")
             # Consider retry logic or raising an alert/error status
 
     def _cancel_all_open_orders(self):
-        """Cancels all tracked open orders for this agent."""
+        """
+        Cancels all tracked open orders for this agent. Uses the exchange's cancel-all for the symbol in
+        one request when every order open on it is ours; otherwise (other agents share the symbol, or the
+        batch call fails) cancels the tracked orders one by one.
+        """
         log.warning(f"[{self.strategy_name}-{self.agent_id}] Cancelling all open orders...")
-        orders_to_cancel = list(self.open_buy_orders.values()) + list(self.open_sell_orders.values())
-        self.open_buy_orders.clear()
-        self.open_sell_orders.clear()
+        with self._orders_lock:
+            orders_to_cancel, self.open_orders = self.open_orders, {}
+            self.orders_by_level.fill(None)
+            self.level_of_client = {}
+        if not orders_to_cancel:
+            return
+
+        live_orders = self.binance_client.get_open_orders(self.symbol)
+        if live_orders is not None and {live.get('clientOrderId') for live in live_orders} <= orders_to_cancel.keys():
+            cancelled = self.binance_client.cancel_all_open_orders(self.symbol)
+            if cancelled is not None:
+                log.warning(f"[{self.strategy_name}-{self.agent_id}] Order cancellation finished. Cancelled all {len(cancelled)} open orders on {self.symbol}.")
+                return
+            log.warning(f"[{self.strategy_name}-{self.agent_id}] Cancel-all request failed. Cancelling orders individually.")
 
         cancelled_count = 0
         failed_count = 0
-        for order in orders_to_cancel:
-             if self._stop_event.is_set(): return
-             order_id = order.get('orderId')
+        for record in orders_to_cancel.values():
+             order_id = record.order_id
              if not order_id: continue
              try:
                  result = self.binance_client.cancel_order(symbol=self.symbol, order_id=order_id)
@@ -287,7 +535,6 @@ class GridStrategy(BaseStrategy):
                  else:
                       log.warning(f"[{self.strategy_name}-{self.agent_id}] Failed to cancel order {order_id} (maybe already filled/cancelled?)")
                       failed_count += 1
-                 time.sleep(0.1) # Avoid rate limits
              except Exception as e:
                  log.exception(f"[{self.strategy_name}-{self.agent_id}] Error cancelling order {order_id}: {e}")
                  failed_count += 1
@@ -297,8 +544,14 @@ class GridStrategy(BaseStrategy):
 
     def _run_logic(self):
         """Core logic loop for the grid strategy."""
-        # Check open orders and replace filled ones
-        self._check_and_replace_orders()
+        # Fills pushed by the user data stream are applied immediately (they also trigger this tick)
+        self._process_order_events()
+
+        # Poll open orders and replace filled ones: every tick without the stream, periodically with it
+        now = time.monotonic()
+        if not self._user_stream_active or now - self._last_reconcile >= ORDER_RECONCILE_INTERVAL_SECONDS:
+            self._last_reconcile = now
+            self._check_and_replace_orders()
 
         # Optional: Add logic to adjust grid if price moves significantly out of range,
         # or to re-evaluate grid density/parameters periodically.
@@ -312,36 +565,36 @@ class GridStrategy(BaseStrategy):
 
     # --- Overrides ---
 
-    def start(self):
-        """Starts the strategy: places initial orders then runs the loop."""
-        if self._thread is not None and self._thread.is_alive():
-            log.warning(f"[{self.strategy_name}-{self.agent_id}] Strategy thread already running.")
-            return
+    def _adapt_parameters(self, new_params: Dict[str, Any]):
+        """Applies runtime-safe parameter updates; grid shape changes need a restart to re-place orders."""
+        grid_keys = {"symbol", "lower_price", "upper_price", "grid_levels", "order_amount_usd"} & new_params.keys()
+        if grid_keys:
+            log.warning(f"[{self.strategy_name}-{self.agent_id}] Ignoring grid parameter changes {sorted(grid_keys)}; restart the agent to apply them.")
+        self._update_parameters({k: v for k, v in new_params.items() if k not in grid_keys})
 
-        log.info(f"[{self.strategy_name}-{self.agent_id}] Starting strategy...")
+    def _on_start(self) -> bool:
+        """Places the initial grid (on the runtime's executor) before the run loop's first tick."""
         self._update_status(AgentStatusEnum.STARTING)
-
-        # Perform initial setup in the main thread before starting the loop thread
-        try:
-            self._place_initial_orders()
-            # If initial placement fails and sets stop_event, don't start the thread
-            if self._stop_event.is_set():
-                 log.error(f"[{self.strategy_name}-{self.agent_id}] Failed during initial order placement. Not starting run loop.")
-                 # Status should already be ERROR
-                 return
-        except Exception as e:
-             log.exception(f"[{self.strategy_name}-{self.agent_id}] Error during initial order placement: {e}")
-             self._update_status(AgentStatusEnum.ERROR, f"Initial placement failed: {str(e)[:100]}")
-             return # Don't start thread
-
-        # Start the background monitoring loop
-        super().start() # Calls the base class start which creates/starts the thread
+        self._place_initial_orders()
+        # If initial placement fails it sets the ERROR status and stop_event; don't start the loop
+        if self._stop_event.is_set():
+             log.error(f"[{self.strategy_name}-{self.agent_id}] Failed during initial order placement. Not starting run loop.")
+             return False
+
+        # Order fills are pushed over the user data stream when available; polling remains the fallback
+        self._user_stream_active = self.binance_client.add_user_event_listener(self._handle_execution_report)
+        if not self._user_stream_active:
+            log.warning(f"[{self.strategy_name}-{self.agent_id}] User data stream unavailable; polling order status every tick.")
+        return True
 
     def stop(self):
         """Stops the strategy: signals the loop and cancels open orders."""
         log.warning(f"[{self.strategy_name}-{self.agent_id}] Initiating strategy stop...")
         # Signal the run loop thread to stop first
         super().stop() # Calls the base class stop which sets the event
+        if self._user_stream_active:
+            self.binance_client.remove_user_event_listener(self._handle_execution_report)
+            self._user_stream_active = False
 
         # Cancel remaining open orders after signaling stop
         # Do this in the main thread (or a separate cleanup task)
@@ -353,23 +606,3 @@ class GridStrategy(BaseStrategy):
              # Don't change status here, let the run loop finish setting final status
 
         log.warning(f"[{self.strategy_name}-{self.agent_id}] Stop process initiated.")
-
-
-    # --- Simulation Helper (Remove in production) ---
-    def _simulate_get_order_status(self, order: Dict) -> Optional[Dict]:
-         """Simulates checking order status. Replace with actual API call."""
-         # Basic simulation: ~10% chance of being filled
-         import random
-         if random.random() < 0.1:
-             log.debug(f"[SIMULATE] Order {order.get('orderId')} marked as FILLED")
-             # Return a structure similar to Binance get_order response
-             return {
-                 **order, # Copy original details
-                 "status": ORDER_STATUS_FILLED,
-                 "executedQty": order.get('origQty'),
-                 "cummulativeQuoteQty": str(Decimal(order.get('price')) * Decimal(order.get('origQty'))),
-                 # Add other fields as needed
-             }
-         else:
-             # Assume still NEW otherwise
-             return {**order, "status": ORDER_STATUS_NEW}
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Optional
+from decouple import config
+
+try:
+    import uvloop # libuv event loop; installed with uvicorn[standard] on Linux/macOS
+except ImportError:
+    uvloop = None
+
+log = logging.getLogger(__name__)
+
+# Threads that run blocking strategy ticks; shared by all agents, so agent count doesn't set thread count
+STRATEGY_WORKERS = config("STRATEGY_WORKERS", default=(os.cpu_count() or 1) * 4, cast=int)
+# Run the strategy loop on uvloop when it is installed (set to False to force the stdlib asyncio loop)
+STRATEGY_USE_UVLOOP = config("STRATEGY_USE_UVLOOP", default=True, cast=bool)
+
+class StrategyRuntime:
+    """
+    Process-wide asyncio event loop, running in one background thread, that drives every strategy's
+    run loop. An agent waiting between iterations is a pending timer on this loop rather than a
+    sleeping OS thread; the blocking strategy logic (python-binance, SQLAlchemy) runs in a fixed-size
+    worker pool installed as the loop's default executor.
+    """
+
+    def __init__(self, max_workers: int = STRATEGY_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The runtime's event loop, started on first use."""
+        with self._lock:
+            if self._loop is None or self._thread is None or not self._thread.is_alive():
+                use_uvloop = STRATEGY_USE_UVLOOP and uvloop is not None
+                self._loop = uvloop.new_event_loop() if use_uvloop else asyncio.new_event_loop()
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="StrategyWorker")
+                self._loop.set_default_executor(self._executor)
+                self._thread = threading.Thread(target=self._run, args=(self._loop,), name="StrategyRuntime", daemon=True)
+                self._thread.start()
+                log.info("Strategy runtime event loop started (%s, %d workers).", "uvloop" if use_uvloop else "asyncio", self.max_workers)
+            return self._loop
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        """Schedules a coroutine on the runtime loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, callback: Callable[..., Any], *args: Any):
+        """Runs a callback on the runtime loop thread (e.g. to set an asyncio.Event)."""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+# Shared runtime used by all strategies in this process
+strategy_runtime = StrategyRuntime()